@@ -21,13 +21,12 @@ setup(
     keywords="hardware, monitoring, temperature, cpu, gpu",
 
     # Package definition
-    packages=["src", "src.ui"],
+    packages=["src", "src.ui", "src.utils"],
 
     # Dependencies
     install_requires=[
         "psutil>=5.9.0",
         "py-cpuinfo>=8.0.0",
-        "GPUtil>=1.4.0",
         "PySide6>=6.4.0",
         "wmi>=1.5.1",
         "pywin32>=305",
@@ -40,7 +39,7 @@ setup(
     },
 
     # Python requirements
-    python_requires=">=3.7",
+    python_requires=">=3.8",
 
     # cx_Freeze specific options for MSI generation
     options={
@@ -0,0 +1,493 @@
+"""
+Soak test for PCPulse: drives HardwareMonitor, DashboardWidget and HistoryWidget
+with synthetic samples on an accelerated clock under the offscreen Qt platform,
+so days of simulated uptime pass in minutes.
+
+The history starts out filled to its real depth (a week of 1 s samples per
+series), the History tab keeps cycling through every series and time span, and
+transient cgroups come and go so sensors are registered and retired all the
+time.
+
+At every checkpoint it records process RSS, live Python objects by type, live
+QObjects, tracemalloc allocation sites and, where they are refcounted, the
+reference counts of None, True and False. Once warm-up is over (history
+buffers trimmed, caches populated, then `--warmup` seconds to settle) all of
+them should be flat; any of them trending the wrong way past its threshold
+fails the run with a non-zero exit code. At full depth with tracemalloc on,
+the first paint of every series is slow enough that warm-up takes minutes.
+
+    python soak.py [--duration SECONDS] [--warmup SECONDS] [--sim-step SECONDS]
+                   [--history-samples N] [--no-prefill] [--no-tracemalloc]
+"""
+
+import argparse
+import gc
+import math
+import os
+import random
+import sys
+import time
+import tracemalloc
+from collections import Counter
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+import psutil
+from PySide6.QtWidgets import QApplication, QWidget, QHBoxLayout
+from PySide6.QtCore import QCoreApplication, QEvent, QObject, QTimer
+
+from src.hardware_monitor import HardwareMonitor
+from src.history import DEFAULT_MAX_SAMPLES
+from src.sample import Sample, SensorSchema
+from src.ui.dashboard import DashboardWidget
+from src.ui.history import HistoryWidget
+
+
+MIB = 1024 * 1024
+
+DEFAULTS = {
+    "duration": 300.0,  # real seconds measured after warm-up
+    "warmup": 60.0,  # real seconds to settle once every view has been drawn, before the baseline
+    "checkpoint": 10.0,  # real seconds between checkpoints
+    "interval": 10,  # ms between synthetic samples
+    "sim_step": 1.0,  # simulated seconds per sample, the app's default interval: 100x real time
+    "history_samples": DEFAULT_MAX_SAMPLES,  # per-series history capacity, as in the app
+    "prefill": True,  # fill the history to capacity before starting
+    "tracemalloc": True,
+}
+
+# Seconds between switches of the History tab to the next time span (and, after the last span, series)
+VIEW_INTERVAL = 1.0
+
+# Samples the filled history can still take before its first trim
+FILL_HEADROOM = 1000
+
+# Checkpoints measured before the baseline, however short --warmup is: memory held by
+# the measurements themselves (tracemalloc snapshots above all) takes a few to level off
+SETTLE_CHECKPOINTS = 5
+
+# Growth from the baseline to the end of the run, along the fitted trend, that fails the soak
+THRESHOLDS = {
+    "rss": 8 * MIB,  # bytes
+    "traced": 4 * MIB,  # bytes held by Python allocations
+    "qobjects": 20,  # live QObjects under the monitor and widgets
+    "objects": 500,  # live instances of any single Python type
+    "allocator": 1 * MIB,  # bytes held by allocations from any single source file
+    "singleton_refs": 100,  # references to None/True/False lost
+}
+
+# Before Python 3.12 None, True and False are refcounted like any object, and
+# an extension that returns them without a new reference drains them until the
+# interpreter aborts with "none_dealloc"/"bool_dealloc". Where they are
+# refcounted the run is cut short with a failure once any of them falls to
+# this fraction of its start; from 3.12 on they are immortal and not tracked.
+SINGLETONS = {"None": None, "True": True, "False": False} if sys.version_info < (3, 12) else {}
+SINGLETON_FLOOR = 0.5
+
+# Frames kept per traced allocation, enough to attribute it to the harness or the app
+TRACE_FRAMES = 8
+
+
+class SyntheticCollector:
+    """Stand-in for SensorCollector producing deterministic readings on an accelerated clock
+
+    Covers every dashboard section: per-core CPU load and temperatures, two
+    GPUs whose temperature sensor drops out now and then, battery text that
+    changes every tick, two long-lived cgroups and transient ones (like
+    containers or systemd scopes) that each live for a while and never come
+    back, retiring their sensors like SensorCollector does.
+    """
+
+    CORES = 8
+    MAX_JOBS = 4
+    JOB_LIFETIME = (300.0, 1800.0)  # simulated seconds
+
+    def __init__(self, interval_ms=1000, schema=None, sim_step=DEFAULTS["sim_step"], seed=0, start_time=None):
+        self.interval = interval_ms
+        self.sim_step = sim_step
+        self.random = random.Random(seed)
+
+        self.schema = schema if schema is not None else SensorSchema()
+        self.sample = Sample(self.schema)
+        self.start_time = time.time() if start_time is None else start_time
+        self.ticks = 0
+
+        # Transient cgroups: name -> (simulated end time, sensor keys)
+        self.jobs = {}
+        self.next_job = 0
+
+    def start(self):
+        pass
+
+    def stop(self):
+        pass
+
+    def wave(self, now, base, amplitude, period=86400.0, noise=1.0):
+        # Daily cycle plus jitter
+        return base + amplitude * math.sin(2 * math.pi * now / period) + self.random.uniform(-noise, noise)
+
+    def collect_data(self):
+        register = self.schema.register
+        sample = self.sample
+        sample.clear()
+        self.ticks += 1
+        now = self.start_time + self.ticks * self.sim_step
+        sample.timestamp = now
+
+        # CPU
+        sample.text["cpu.name"] = "Synthetic CPU"
+        sample.set(register("cpu.cores", "Cores", "cpu", "count"), self.CORES)
+        sample.set(register("cpu.threads", "Threads", "cpu", "count"), 2 * self.CORES)
+        load = min(max(self.wave(now, 40, 30, noise=10), 0), 100)
+        sample.set(register("cpu.usage", "CPU Load", "cpu", "load", "%", 0, 100, chart=True), load)
+        sample.set(register("cpu.frequency", "CPU Frequency", "cpu", "clock", "MHz", chart=True),
+                   self.wave(now, 3200, 600, noise=100))
+        sample.set(register("cpu.temperature.CPU Package", "CPU Package", "cpu", "temperature", "°C", 0, 110,
+                            chart=True), self.wave(now, 55, 20))
+        for core in range(self.CORES):
+            sample.set(register(f"cpu.core{core}.usage", f"Core {core} Load", "cpu", "core_load", "%", 0, 100),
+                       min(max(load + self.random.uniform(-15, 15), 0), 100))
+            sample.set(register(f"cpu.temperature.CPU Core #{core + 1}", f"CPU Core #{core + 1}", "cpu",
+                                "temperature", "°C", 0, 110, chart=True), self.wave(now, 52, 22, noise=3))
+
+        # GPU
+        for index in range(2):
+            prefix = f"gpu.nvidia.{index}"
+            label = f"NVIDIA GPU {index}"
+            sample.text[f"{prefix}.name"] = f"Synthetic GPU {index}"
+            temperature = None if self.random.random() < 0.05 else self.wave(now, 60, 15)
+            sample.set(register(f"{prefix}.temperature", label, "gpu", "temperature", "°C", 0, 110, chart=True),
+                       temperature)
+            sample.set(register(f"{prefix}.load", f"{label} Load", "gpu", "load", "%", 0, 100, chart=True),
+                       min(max(self.wave(now, 50, 40, noise=10), 0), 100))
+            sample.set(register(f"{prefix}.memory_used", f"{label} Memory Used", "gpu", "memory", "MiB"),
+                       self.wave(now, 4000, 2000, noise=50))
+            sample.set(register(f"{prefix}.power", f"{label} Power", "gpu", "power", "W", chart=True),
+                       self.wave(now, 150, 100, noise=5))
+
+        # Motherboard
+        sample.text["motherboard.manufacturer"] = "Synthetic"
+        sample.text["motherboard.model"] = "Board"
+        charge = 50 + 50 * math.cos(2 * math.pi * now / 14400)
+        sample.set(register("motherboard.battery.charge", "Battery Charge", "motherboard", "charge", "%", 0, 100,
+                            chart=True), charge)
+        sample.text["motherboard.battery.status"] = "charging" if charge < 50 else "discharging"
+        sample.text["motherboard.battery.remaining"] = f"{int(charge) // 20}:{int(charge * 60) % 60:02d} remaining"
+        sample.set(register("motherboard.power", "System Power", "motherboard", "power", "W"),
+                   self.wave(now, 60, 20))
+
+        # cgroups; jobs that ended take their sensors with them
+        for job in [job for job, (end, _) in self.jobs.items() if end <= now]:
+            self.schema.retire(self.jobs.pop(job)[1])
+        if len(self.jobs) < self.MAX_JOBS and self.random.random() < 0.005 * self.sim_step:
+            self.jobs[f"job-{self.next_job}"] = (now + self.random.uniform(*self.JOB_LIFETIME), [])
+            self.next_job += 1
+
+        for relpath in ["", "worker", *self.jobs]:
+            name = relpath or "Cgroup"
+            keys = (f"cgroup.{relpath or '.'}.cpu_percent", f"cgroup.{relpath or '.'}.memory_current")
+            sample.set(register(keys[0], f"{name} CPU Usage", "cgroup", "load", "%", 0, None, True),
+                       self.wave(now, 80, 60, noise=20))
+            sample.set(register(keys[1], f"{name} Memory Used", "cgroup", "memory", "MiB", 0, None, True),
+                       self.wave(now, 512, 128, noise=16))
+            if relpath in self.jobs:
+                self.jobs[relpath][1][:] = keys
+        return sample
+
+
+def linear_growth(points):
+    """Growth over the span of (time, value) points along their least-squares trend line"""
+    if len(points) < 2:
+        return 0.0
+    n = len(points)
+    mean_t = sum(t for t, _ in points) / n
+    mean_v = sum(v for _, v in points) / n
+    variance = sum((t - mean_t) ** 2 for t, _ in points)
+    if variance == 0:
+        return 0.0
+    slope = sum((t - mean_t) * (v - mean_v) for t, v in points) / variance
+    return slope * (points[-1][0] - points[0][0])
+
+
+class Soak:
+    """Runs the widgets on synthetic data and samples memory metrics at every checkpoint"""
+
+    def __init__(self, duration=DEFAULTS["duration"], warmup=DEFAULTS["warmup"],
+                 checkpoint=DEFAULTS["checkpoint"], interval=DEFAULTS["interval"], sim_step=DEFAULTS["sim_step"],
+                 history_samples=DEFAULTS["history_samples"], prefill=DEFAULTS["prefill"],
+                 trace=DEFAULTS["tracemalloc"]):
+        self.duration = duration
+        self.warmup = warmup
+        self.checkpoint_interval = checkpoint
+        self.interval = interval
+        self.sim_step = sim_step
+        self.prefill = prefill
+        self.trace = trace
+
+        self.monitor = HardwareMonitor(
+            update_interval=interval,
+            collector_factory=lambda interval_ms, schema: SyntheticCollector(interval_ms, schema, sim_step))
+        # Series pick up the capacity when they are created on the first reading
+        self.monitor.history.max_samples = history_samples
+
+        self.window = QWidget()
+        layout = QHBoxLayout(self.window)
+        self.dashboard = DashboardWidget(self.monitor)
+        self.history_widget = HistoryWidget(self.monitor)
+        layout.addWidget(self.dashboard)
+        layout.addWidget(self.history_widget)
+        self.window.resize(1400, 900)
+
+        self.process = psutil.Process()
+        self.started = None
+        self.settle_time = None  # when the history, statistics and views were first all warm
+        self.baseline_time = None
+        self.views = 0  # history views shown
+        self.settle_checkpoints = 0  # checkpoints measured while settling
+        self.metrics = {"rss": [], "traced": [], "qobjects": []}
+        self.object_counts = []  # (elapsed, Counter) per checkpoint after warm-up
+        self.singleton_refs = {name: [] for name in SINGLETONS}
+        self.singleton_start = {}
+        self.aborted = None
+        self.baseline_snapshot = None
+        self.last_snapshot = None
+
+        self.timer = QTimer()
+        self.timer.timeout.connect(self.checkpoint)
+
+        # Keep switching the History tab so every zoom level of every series gets drawn
+        self.view_timer = QTimer()
+        self.view_timer.timeout.connect(self.next_view)
+
+        # Refcount leaks can kill the interpreter between two checkpoints, so watch them more often
+        self.guard_timer = QTimer()
+        self.guard_timer.timeout.connect(self.guard)
+
+    def run(self):
+        if self.prefill:
+            self.fill_history()
+        if self.trace:
+            tracemalloc.start(TRACE_FRAMES)
+        self.singleton_start = {name: sys.getrefcount(obj) for name, obj in SINGLETONS.items()}
+        self.window.show()
+        self.monitor.start()
+        self.started = time.monotonic()
+        self.timer.start(int(self.checkpoint_interval * 1000))
+        self.view_timer.start(int(VIEW_INTERVAL * 1000))
+        if SINGLETONS:
+            self.guard_timer.start(1000)
+        QApplication.instance().exec()
+        self.monitor.stop()
+        if self.trace:
+            tracemalloc.stop()
+        return self.report()
+
+    def fill_history(self):
+        """Record samples leading up to now until the history is just short of its first trim"""
+        history = self.monitor.history
+        count = max(history.max_samples + history.max_samples // 10 - FILL_HEADROOM, 0)
+        print(f"Filling the history with {count} samples ({count * self.sim_step / 86400:.1f} simulated days)")
+
+        started = time.monotonic()
+        collector = SyntheticCollector(self.interval, self.monitor.schema, self.sim_step, seed=1,
+                                       start_time=time.time() - count * self.sim_step)
+        for _ in range(count):
+            history.record(collector.collect_data())
+        # Jobs still running in the filler never report again
+        for _, keys in collector.jobs.values():
+            self.monitor.schema.retire(keys)
+        print(f"History filled in {time.monotonic() - started:.0f} s")
+
+    def next_view(self):
+        """Show the next time span, and after the longest one the next series"""
+        spans = self.history_widget.span_combo
+        spans.setCurrentIndex((spans.currentIndex() + 1) % spans.count())
+        combo = self.history_widget.series_combo
+        if spans.currentIndex() == 0 and combo.count():
+            combo.setCurrentIndex((combo.currentIndex() + 1) % combo.count())
+        self.views += 1
+
+    def views_needed(self):
+        """Views for one pass over every series at every span"""
+        return self.history_widget.series_combo.count() * self.history_widget.span_combo.count()
+
+    def warmed_up(self, elapsed):
+        """Warm-up lasts until the history has been trimmed, the statistics windows have
+        filled and every series has been drawn at every span, then settles for `warmup`
+        seconds and at least SETTLE_CHECKPOINTS checkpoints"""
+        if self.settle_time is None:
+            samples = self.monitor.worker.samples
+            if (samples > FILL_HEADROOM and self.views >= self.views_needed()
+                    and samples * self.sim_step >= self.monitor.statistics.window):
+                self.settle_time = elapsed
+            return False
+        return elapsed - self.settle_time >= self.warmup and self.settle_checkpoints >= SETTLE_CHECKPOINTS
+
+    def live_qobjects(self):
+        # Count widgets scheduled with deleteLater() as gone
+        QCoreApplication.sendPostedEvents(None, QEvent.DeferredDelete)
+        return sum(len(root.findChildren(QObject)) for root in (self.monitor, self.window))
+
+    def take_snapshot(self):
+        """Traced allocations of the application, leaving out the harness and tracemalloc itself"""
+        return tracemalloc.take_snapshot().filter_traces([
+            tracemalloc.Filter(False, __file__, all_frames=True),
+            tracemalloc.Filter(False, tracemalloc.__file__, all_frames=True),
+        ])
+
+    def guard(self):
+        for name, obj in SINGLETONS.items():
+            refs = sys.getrefcount(obj)
+            if refs < self.singleton_start[name] * SINGLETON_FLOOR:
+                self.aborted = (f"references to {name} fell from {self.singleton_start[name]} to {refs}: "
+                                f"something releases references it does not own, stopping before the "
+                                f"interpreter aborts")
+                self.stop()
+                return
+
+    def stop(self):
+        self.timer.stop()
+        self.view_timer.stop()
+        self.guard_timer.stop()
+        QApplication.instance().quit()
+
+    def checkpoint(self):
+        elapsed = time.monotonic() - self.started
+        baseline = self.baseline_time is None and self.warmed_up(elapsed)
+        if baseline:
+            self.baseline_time = elapsed
+
+        if self.settle_time is None:
+            print(f"[{elapsed:6.0f} s] warming up: {self.monitor.worker.samples} samples, "
+                  f"{self.views} of {self.views_needed()} history views drawn")
+            return
+
+        # Measure while settling too, so the memory held by the measurements themselves
+        # (snapshots above all) is already in place at the baseline
+        gc.collect()
+        rss = self.process.memory_info().rss
+        qobjects = self.live_qobjects()
+        refs = {name: sys.getrefcount(obj) for name, obj in SINGLETONS.items()}
+        if self.trace:
+            self.last_snapshot = self.take_snapshot()
+            traced = sum(stat.size for stat in self.last_snapshot.statistics("filename"))
+            if baseline or self.baseline_snapshot is None:
+                self.baseline_snapshot = self.last_snapshot
+        counts = Counter(type(obj).__name__ for obj in gc.get_objects())
+
+        if self.baseline_time is None:
+            self.settle_checkpoints += 1
+            print(f"[{elapsed:6.0f} s] settling: {self.monitor.worker.samples} samples, "
+                  f"RSS {rss / MIB:.1f} MiB, {qobjects} QObjects")
+            return
+
+        self.metrics["rss"].append((elapsed, rss))
+        self.metrics["qobjects"].append((elapsed, qobjects))
+        for name, count in refs.items():
+            self.singleton_refs[name].append((elapsed, count))
+        if self.trace:
+            self.metrics["traced"].append((elapsed, traced))
+        self.object_counts.append((elapsed, counts))
+
+        stats = self.monitor.sampling_stats()
+        print(f"[{elapsed:6.0f} s] {stats['samples']} samples, "
+              f"{stats['samples'] * self.sim_step / 86400:.1f} simulated days, "
+              f"{len(self.monitor.history.series_names())} series, "
+              f"RSS {rss / MIB:.1f} MiB, {qobjects} QObjects")
+
+        if elapsed - self.baseline_time >= self.duration:
+            self.stop()
+
+    def report(self):
+        """Print the trends and return the list of failures"""
+        failures = []
+        print()
+        for name, points in self.metrics.items():
+            if not points:
+                continue
+            growth = linear_growth(points)
+            scale, unit = (MIB, " MiB") if name in ("rss", "traced") else (1, "")
+            print(f"{name:>10}: {points[0][1] / scale:.1f} -> {points[-1][1] / scale:.1f}{unit}, "
+                  f"trend {growth / scale:+.1f}{unit}")
+            if growth > THRESHOLDS[name]:
+                failures.append(f"{name} grew by {growth / scale:.1f}{unit}")
+
+        # References to None/True/False must not drain away
+        for name, points in self.singleton_refs.items():
+            decline = -linear_growth(points)
+            if decline > THRESHOLDS["singleton_refs"]:
+                failures.append(f"lost {decline:.0f} references to {name}")
+        if self.aborted:
+            failures.append(self.aborted)
+        if self.baseline_time is None:
+            failures.append("stopped before warm-up was over, nothing was measured")
+
+        # Python objects by type
+        if len(self.object_counts) >= 2:
+            types = set(self.object_counts[0][1]) | set(self.object_counts[-1][1])
+            growth = {name: linear_growth([(t, counts[name]) for t, counts in self.object_counts])
+                      for name in types}
+            print("\nFastest growing object types:")
+            for name, grown in sorted(growth.items(), key=lambda item: -item[1])[:10]:
+                print(f"  {name:<30} {self.object_counts[-1][1][name]:>8} ({grown:+.0f})")
+                if grown > THRESHOLDS["objects"]:
+                    failures.append(f"{grown:.0f} more live {name} objects")
+
+        # Allocation sites; judged per file, since a buffer reallocated from another
+        # line of the same file (e.g. trimmed history arrays) merely moves between lines
+        if self.baseline_time is not None and self.last_snapshot is not self.baseline_snapshot:
+            print("\nTop allocation sites by growth:")
+            for stat in self.last_snapshot.compare_to(self.baseline_snapshot, "lineno")[:10]:
+                print(f"  {stat}")
+            for stat in self.last_snapshot.compare_to(self.baseline_snapshot, "filename"):
+                if stat.size_diff > THRESHOLDS["allocator"]:
+                    failures.append(f"allocations from {stat.traceback} grew by {stat.size_diff / MIB:.1f} MiB")
+
+        print()
+        if failures:
+            print("SOAK FAILED:")
+            for failure in failures:
+                print(f"  {failure}")
+        else:
+            print("Soak passed: no upward memory trend")
+        return failures
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip(),
+                                     formatter_class=argparse.ArgumentDefaultsHelpFormatter)
+    parser.add_argument("--duration", type=float, default=DEFAULTS["duration"], metavar="SECONDS",
+                        help="real seconds measured after warm-up")
+    parser.add_argument("--warmup", type=float, default=DEFAULTS["warmup"], metavar="SECONDS",
+                        help="real seconds to settle once every view has been drawn, before the baseline")
+    parser.add_argument("--checkpoint", type=float, default=DEFAULTS["checkpoint"], metavar="SECONDS",
+                        help="real seconds between checkpoints")
+    parser.add_argument("--interval", type=int, default=DEFAULTS["interval"], metavar="MS",
+                        help="milliseconds between synthetic samples")
+    parser.add_argument("--sim-step", type=float, default=DEFAULTS["sim_step"], metavar="SECONDS",
+                        help="simulated seconds per sample")
+    parser.add_argument("--history-samples", type=int, default=DEFAULTS["history_samples"], metavar="N",
+                        help="per-series history capacity")
+    parser.add_argument("--prefill", action=argparse.BooleanOptionalAction, default=DEFAULTS["prefill"],
+                        help="fill the history to capacity before starting")
+    parser.add_argument("--tracemalloc", action=argparse.BooleanOptionalAction, default=DEFAULTS["tracemalloc"],
+                        help="record allocation sites at every checkpoint")
+    return parser.parse_args(argv[1:])
+
+
+def main():
+    args = parse_args(sys.argv)
+    app = QApplication(sys.argv[:1])
+    soak = Soak(args.duration, args.warmup, args.checkpoint, args.interval,
+                args.sim_step, args.history_samples, args.prefill, args.tracemalloc)
+    failures = soak.run()
+    if soak.aborted:
+        # Interpreter teardown would hit the drained refcount
+        sys.stdout.flush()
+        os._exit(1)
+    del app
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
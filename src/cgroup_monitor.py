@@ -0,0 +1,274 @@
+import os
+import time
+
+
+DEFAULT_CGROUP_ROOT = "/sys/fs/cgroup"
+
+# How often the child cgroup tree is rescanned for new or removed cgroups
+RESCAN_INTERVAL = 10.0  # s
+
+# Bounds on the child cgroups followed, each of which adds a dozen sensors
+DEFAULT_MAX_CHILDREN = 32
+DEFAULT_MAX_DEPTH = 2
+
+_READ_SIZE = 64 * 1024
+
+
+def own_cgroup_path(proc_cgroup="/proc/self/cgroup"):
+    """Path of this process's cgroup v2 (the '0::' line), None on cgroup v1-only hosts"""
+    try:
+        with open(proc_cgroup) as f:
+            for line in f:
+                if line.startswith("0::"):
+                    return line[3:].strip()
+    except OSError:
+        pass
+    return None
+
+
+def parse_flat_keyed(text):
+    """Parse 'key value' lines such as cpu.stat"""
+    values = {}
+    for line in text.splitlines():
+        parts = line.split()
+        if len(parts) == 2:
+            try:
+                values[parts[0]] = int(parts[1])
+            except ValueError:
+                pass
+    return values
+
+
+def parse_pressure(text):
+    """Parse a PSI file into {'some': total_usec, 'full': total_usec}"""
+    totals = {}
+    for line in text.splitlines():
+        parts = line.split()
+        if not parts:
+            continue
+        for field in parts[1:]:
+            if field.startswith("total="):
+                totals[parts[0]] = int(field[6:])
+    return totals
+
+
+def parse_io_stat(text):
+    """Sum read and written bytes over all devices of an io.stat file"""
+    rbytes = wbytes = 0
+    for line in text.splitlines():
+        for field in line.split()[1:]:
+            key, _, value = field.partition("=")
+            if key == "rbytes":
+                rbytes += int(value)
+            elif key == "wbytes":
+                wbytes += int(value)
+    return rbytes, wbytes
+
+
+def parse_max(text):
+    """Parse a limit file ('max' or a number); None means unlimited"""
+    text = text.strip()
+    if not text or text == "max":
+        return None
+    return int(text)
+
+
+class _CgroupFiles:
+    """Open descriptors of one cgroup's accounting files, re-read with pread each tick"""
+
+    FILES = ("cpu.stat", "cpu.max", "memory.current", "memory.max", "memory.pressure", "io.stat")
+
+    def __init__(self, path):
+        self.path = path
+        self.fds = {}
+        for name in self.FILES:
+            try:
+                self.fds[name] = os.open(os.path.join(path, name), os.O_RDONLY)
+            except OSError:
+                # Controller not enabled for this cgroup
+                pass
+
+        # Counters from the previous read, for per-tick deltas
+        self.previous = None
+
+    def read(self, name):
+        fd = self.fds.get(name)
+        if fd is None:
+            return None
+        return os.pread(fd, _READ_SIZE, 0).decode()
+
+    def close(self):
+        for fd in self.fds.values():
+            try:
+                os.close(fd)
+            except OSError:
+                pass
+        self.fds.clear()
+
+
+class CgroupMonitor:
+    """cgroup v2 resource accounting for our own cgroup and, optionally, every cgroup below it
+
+    Reports what the workload is actually allowed and using: CPU against its
+    cpu.max quota, throttling ratio, memory against memory.max, memory PSI
+    stall time and I/O throughput, all as per-tick deltas. Children are
+    followed up to `max_depth` levels down and at most `max_children` at a
+    time, shallowest first. `root` and `cgroup` can point at a fake tree for
+    testing.
+    """
+
+    def __init__(self, root=DEFAULT_CGROUP_ROOT, cgroup=None, include_children=False,
+                 proc_cgroup="/proc/self/cgroup", max_children=DEFAULT_MAX_CHILDREN, max_depth=DEFAULT_MAX_DEPTH):
+        self.root = root
+        self.cgroup = cgroup if cgroup is not None else own_cgroup_path(proc_cgroup)
+        self.include_children = include_children
+        self.max_children = max_children
+        self.max_depth = max_depth
+        self.skipped = 0  # child cgroups found but not followed at the last scan
+
+        self._groups = {}  # relative path ("" for our own cgroup) -> _CgroupFiles
+        self._last_scan = 0.0
+
+    @property
+    def path(self):
+        if self.cgroup is None:
+            return None
+        return os.path.join(self.root, self.cgroup.lstrip("/"))
+
+    def available(self):
+        """True if the cgroup v2 unified hierarchy is mounted and our cgroup was found"""
+        path = self.path
+        return (path is not None and os.path.isfile(os.path.join(self.root, "cgroup.controllers"))
+                and os.path.isdir(path))
+
+    def start(self):
+        if self.available():
+            self._groups[""] = _CgroupFiles(self.path)
+            self._rescan(time.monotonic())
+
+    def stop(self):
+        for group in self._groups.values():
+            group.close()
+        self._groups.clear()
+
+    def _rescan(self, now):
+        self._last_scan = now
+        if not self.include_children:
+            return
+
+        base = self.path
+        found = set()
+        for dirpath, dirnames, _ in os.walk(base):
+            depth = 0 if dirpath == base else os.path.relpath(dirpath, base).count(os.sep) + 1
+            if depth >= self.max_depth:
+                # Do not descend any further
+                dirnames[:] = []
+            for dirname in dirnames:
+                found.add(os.path.relpath(os.path.join(dirpath, dirname), base))
+
+        for relpath in list(self._groups):
+            if relpath and relpath not in found:
+                self._groups.pop(relpath).close()
+
+        # Cgroups already followed keep their place; new ones fill up what is left, shallowest first
+        new = sorted(found - set(self._groups), key=lambda relpath: (relpath.count(os.sep), relpath))
+        room = max(self.max_children - (len(self._groups) - 1), 0)
+        skipped = len(new) - room
+        if skipped > 0 and skipped != self.skipped:
+            print(f"Following {self.max_children} child cgroups, {skipped} more are not shown")
+        self.skipped = max(skipped, 0)
+        for relpath in new[:room]:
+            self._groups[relpath] = _CgroupFiles(os.path.join(base, relpath))
+
+    def read(self):
+        """Per-cgroup readings as {relative path: {metric: value}}; deltas need two reads"""
+        now = time.monotonic()
+        if self.include_children and now - self._last_scan >= RESCAN_INTERVAL:
+            self._rescan(now)
+
+        readings = {}
+        for relpath, group in list(self._groups.items()):
+            try:
+                readings[relpath] = self._read_group(group, now)
+            except OSError:
+                # The cgroup went away between scans
+                if relpath:
+                    self._groups.pop(relpath).close()
+        return readings
+
+    @staticmethod
+    def _read_group(group, now):
+        reading = {}
+
+        cpu_stat = parse_flat_keyed(group.read("cpu.stat") or "")
+        cpu_max = group.read("cpu.max")
+        memory_current = group.read("memory.current")
+        memory_max = group.read("memory.max")
+        pressure = parse_pressure(group.read("memory.pressure") or "")
+        io_stat = group.read("io.stat")
+        rbytes, wbytes = parse_io_stat(io_stat) if io_stat is not None else (None, None)
+
+        # Limits and instantaneous values
+        if cpu_max is not None:
+            quota, _, period = cpu_max.partition(" ")
+            quota = parse_max(quota)
+            reading["cpu_limit"] = quota / int(period) if quota is not None and period.strip() else None
+        if memory_current is not None:
+            reading["memory_current"] = int(memory_current)
+        if memory_max is not None:
+            reading["memory_max"] = parse_max(memory_max)
+            if reading["memory_max"] and "memory_current" in reading:
+                reading["memory_percent"] = 100 * reading["memory_current"] / reading["memory_max"]
+
+        counters = {
+            "time": now,
+            "usage_usec": cpu_stat.get("usage_usec"),
+            "nr_periods": cpu_stat.get("nr_periods"),
+            "nr_throttled": cpu_stat.get("nr_throttled"),
+            "throttled_usec": cpu_stat.get("throttled_usec"),
+            "some": pressure.get("some"),
+            "full": pressure.get("full"),
+            "rbytes": rbytes,
+            "wbytes": wbytes,
+        }
+
+        # Deltas against the previous read of this cgroup
+        previous = group.previous
+        group.previous = counters
+        if previous is None:
+            return reading
+
+        elapsed = now - previous["time"]
+        if elapsed <= 0:
+            return reading
+
+        def delta(key):
+            if counters[key] is None or previous[key] is None:
+                return None
+            return max(counters[key] - previous[key], 0)
+
+        usage = delta("usage_usec")
+        if usage is not None:
+            # Percent of one CPU, like top
+            reading["cpu_percent"] = 100 * usage / (elapsed * 1e6)
+            if reading.get("cpu_limit"):
+                reading["cpu_limit_percent"] = reading["cpu_percent"] / reading["cpu_limit"]
+
+        periods = delta("nr_periods")
+        throttled = delta("nr_throttled")
+        if periods is not None and throttled is not None:
+            reading["throttled_ratio"] = 100 * throttled / periods if periods else 0.0
+        throttled_usec = delta("throttled_usec")
+        if throttled_usec is not None:
+            reading["throttled_percent"] = 100 * throttled_usec / (elapsed * 1e6)
+
+        for kind in ("some", "full"):
+            stalled = delta(kind)
+            if stalled is not None:
+                reading[f"memory_pressure_{kind}"] = 100 * stalled / (elapsed * 1e6)
+
+        for key, name in (("rbytes", "io_read"), ("wbytes", "io_write")):
+            moved = delta(key)
+            if moved is not None:
+                reading[name] = moved / elapsed
+        return reading
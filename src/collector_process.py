@@ -0,0 +1,170 @@
+import multiprocessing
+import os
+import signal
+import threading
+import time
+
+from src.shm_ring import SampleRing
+
+
+# Longest the child may go without a heartbeat before it is considered wedged
+DEFAULT_HANG_TIMEOUT = 15.0  # s
+
+
+def _default_collector(interval_ms, **options):
+    from src.collectors import SensorCollector
+    return SensorCollector(interval_ms=interval_ms, **options)
+
+
+def collector_main(ring_name, interval_ms, stop_event, refresh_event, collector_factory=None, collector_options=None):
+    """Entry point of the collector child: sample on a fixed cadence and publish into the ring"""
+    # Ctrl+C is for the parent; the supervisor decides when the child goes away
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+    parent_pid = os.getppid()
+    ring = SampleRing.attach(ring_name)
+    ring.beat()
+
+    collector = (collector_factory or _default_collector)(interval_ms, **(collector_options or {}))
+    collector.start()
+
+    period = interval_ms / 1000
+    try:
+        next_tick = time.monotonic()
+        while not stop_event.is_set() and os.getppid() == parent_pid:
+            ring.beat()
+
+            # Wait in short slices so the heartbeat keeps ticking during long intervals
+            remaining = next_tick - time.monotonic()
+            if remaining > 0:
+                if not refresh_event.wait(min(remaining, 1.0)):
+                    continue
+                refresh_event.clear()
+                if stop_event.is_set():
+                    break
+                refresh = True
+            else:
+                refresh = False
+
+            ring.write_sample(collector.collect_data())
+
+            if not refresh:
+                next_tick += period
+                late = time.monotonic() - next_tick
+                if late > 0:
+                    next_tick += (int(late // period) + 1) * period
+    finally:
+        collector.stop()
+        ring.close()
+
+
+class CollectorSupervisor:
+    """Runs sensor collection in a child process and restarts it when it crashes or hangs
+
+    The child publishes Samples into a shared-memory SampleRing owned by this
+    object; readers in the UI process decode its value vectors directly and
+    never unpickle anything per tick.
+    """
+
+    def __init__(self, interval_ms=1000, slot_count=64, capacity=1024,
+                 hang_timeout=DEFAULT_HANG_TIMEOUT, check_interval=0.5, collector_factory=None,
+                 collector_options=None):
+        self.interval_ms = interval_ms
+        self.slot_count = slot_count
+        self.capacity = capacity
+        self.hang_timeout = hang_timeout
+        self.check_interval = check_interval
+        self.collector_factory = collector_factory
+        self.collector_options = collector_options
+
+        self.ring = None
+        self.restarts = 0
+        self.last_error = None
+
+        # Fork is unsafe once Qt threads exist, always start from a fresh interpreter
+        self._context = multiprocessing.get_context("spawn")
+        self._process = None
+        self._spawned = 0.0
+        self._stop_event = None
+        self._refresh_event = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self.ring = SampleRing.create(self.slot_count, self.capacity)
+        self._stop.clear()
+        self._spawn()
+        self._thread = threading.Thread(target=self._supervise, name="collector-supervisor", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=0.5):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+        process = self._process
+        if process is not None:
+            self._stop_event.set()
+            self._refresh_event.set()
+            process.join(timeout)
+            self._kill(process)
+            self._process = None
+
+        if self.ring is not None:
+            self.ring.close()
+            self.ring = None
+
+    def request_refresh(self):
+        """Ask the child for an immediate out-of-band sample"""
+        if self._refresh_event is not None:
+            self._refresh_event.set()
+
+    def is_alive(self):
+        return self._process is not None and self._process.is_alive()
+
+    def _spawn(self):
+        self._stop_event = self._context.Event()
+        self._refresh_event = self._context.Event()
+        self._process = self._context.Process(
+            target=collector_main,
+            args=(self.ring.name, self.interval_ms, self._stop_event, self._refresh_event,
+                  self.collector_factory, self.collector_options),
+            name="pcpulse-collector",
+            daemon=True,
+        )
+        self._spawned = time.monotonic()
+        self._process.start()
+
+    def _supervise(self):
+        failures = 0
+        while not self._stop.wait(self.check_interval):
+            process = self._process
+            if not process.is_alive():
+                error = f"Collector process exited with code {process.exitcode}"
+            elif time.monotonic() - max(self.ring.heartbeat(), self._spawned) > self.hang_timeout:
+                error = f"Collector process stopped responding for {self.hang_timeout:.0f} s"
+            else:
+                if time.monotonic() - self._spawned > self.hang_timeout:
+                    failures = 0
+                continue
+
+            print(f"{error}, restarting")
+            self.last_error = error
+            self._kill(process)
+
+            # Back off while the child keeps dying right after start
+            failures += 1
+            if self._stop.wait(min(0.5 * 2 ** (failures - 1), 30.0)):
+                break
+            self.restarts += 1
+            self._spawn()
+
+    @staticmethod
+    def _kill(process):
+        if process.is_alive():
+            process.terminate()
+            process.join(1.0)
+        if process.is_alive():
+            process.kill()
+            process.join(1.0)
@@ -0,0 +1,338 @@
+import psutil
+import platform
+import cpuinfo
+import time
+import subprocess
+
+from src.cgroup_monitor import CgroupMonitor
+from src.gpu_monitor import GPUMonitor
+from src.sample import Sample, SensorSchema
+
+
+MIB = 1024 * 1024
+
+# cgroup metrics shown per cgroup: reading key -> (label, kind, unit, scale, charted for our own cgroup)
+CGROUP_METRICS = {
+    "cpu_percent": ("CPU Usage", "load", "%", 1, True),
+    "cpu_limit": ("CPU Limit", "count", "cores", 1, False),
+    "cpu_limit_percent": ("CPU Usage of Limit", "load", "%", 1, True),
+    "throttled_ratio": ("Throttled Periods", "throttling", "%", 1, True),
+    "throttled_percent": ("Throttled Time", "throttling", "%", 1, False),
+    "memory_current": ("Memory Used", "memory", "MiB", MIB, True),
+    "memory_max": ("Memory Limit", "memory", "MiB", MIB, False),
+    "memory_percent": ("Memory Used of Limit", "load", "%", 1, True),
+    "memory_pressure_some": ("Memory Pressure (some)", "pressure", "%", 1, True),
+    "memory_pressure_full": ("Memory Pressure (full)", "pressure", "%", 1, False),
+    "io_read": ("I/O Read", "io", "MiB/s", MIB, True),
+    "io_write": ("I/O Write", "io", "MiB/s", MIB, True),
+}
+
+# Metrics charted for child cgroups, when asked for; a week of history costs about 10 MB per series
+CHILD_CHARTED_METRICS = ("cpu_percent", "memory_current")
+
+
+class SensorCollector:
+    """Blocking sensor probes, kept free of Qt so they can run in a worker thread or a child process
+
+    Each tick fills one preallocated Sample in place; sensors are registered
+    in the schema the first time they are seen and keep their id afterwards.
+    """
+
+    def __init__(self, interval_ms=1000, schema=None, cgroup=None, chart_cgroup_children=False):
+        self.interval = interval_ms
+        self.gpu_monitor = None
+
+        # Container-aware mode: `cgroup` holds CgroupMonitor options, None disables it
+        self.cgroup_options = cgroup
+        self.cgroup_monitor = None
+        self.chart_cgroup_children = chart_cgroup_children
+        self._cgroup_keys = {}  # relative path -> sensor keys registered for that cgroup
+
+        self.schema = schema if schema is not None else SensorSchema()
+        self.sample = Sample(self.schema)
+
+        # Fixed sensors get their ids up front
+        self.CPU_USAGE = self.schema.register("cpu.usage", "CPU Load", "cpu", "load", "%", 0, 100, chart=True)
+        self.CPU_FREQUENCY = self.schema.register("cpu.frequency", "CPU Frequency", "cpu", "clock", "MHz", chart=True)
+        self.CPU_CORES = self.schema.register("cpu.cores", "Cores", "cpu", "count")
+        self.CPU_THREADS = self.schema.register("cpu.threads", "Threads", "cpu", "count")
+
+        # Static CPU description, read once rather than every tick
+        self._cpu_name = None
+
+    def start(self):
+        # GPU telemetry streams in on its own reader thread while the collector is active
+        self.gpu_monitor = GPUMonitor(interval_ms=self.interval)
+        self.gpu_monitor.start()
+
+        if self.cgroup_options is not None and platform.system() == "Linux":
+            self.cgroup_monitor = CgroupMonitor(**self.cgroup_options)
+            if self.cgroup_monitor.available():
+                self.cgroup_monitor.start()
+            else:
+                print("cgroup v2 hierarchy not found, container monitoring disabled")
+                self.cgroup_monitor = None
+
+    def stop(self):
+        if self.gpu_monitor is not None:
+            self.gpu_monitor.stop()
+        if self.cgroup_monitor is not None:
+            self.cgroup_monitor.stop()
+
+    def collect_data(self):
+        """Collect all sensor data into the reused Sample - runs off the UI thread"""
+        sample = self.sample
+        sample.clear()
+        sample.timestamp = time.time()
+        self.read_cpu(sample)
+        self.read_gpu(sample)
+        self.read_motherboard(sample)
+        if self.cgroup_monitor is not None:
+            self.read_cgroups(sample)
+        return sample
+
+    def read_cpu(self, sample):
+        """Read CPU load, frequency and temperatures safely"""
+        register = self.schema.register
+        try:
+            if self._cpu_name is None:
+                self._cpu_name = cpuinfo.get_cpu_info().get('brand_raw', "Unknown CPU")
+            sample.text["cpu.name"] = self._cpu_name
+            sample.set(self.CPU_CORES, psutil.cpu_count(logical=False))
+            sample.set(self.CPU_THREADS, psutil.cpu_count(logical=True))
+
+            sample.set(self.CPU_USAGE, psutil.cpu_percent(interval=None))
+            for core, usage in enumerate(psutil.cpu_percent(interval=None, percpu=True)):
+                sample.set(register(f"cpu.core{core}.usage", f"Core {core} Load", "cpu", "core_load", "%", 0, 100),
+                           usage)
+
+            # Get CPU temperature with timeout safety
+            try:
+                temps = self.get_cpu_temperature()
+            except:
+                temps = {"CPU": None}
+            for sensor_name, temp in temps.items():
+                if sensor_name in ("error", "note"):
+                    sample.text[f"cpu.temperature.{sensor_name}"] = temp
+                    continue
+                sample.set(register(f"cpu.temperature.{sensor_name}", sensor_name, "cpu", "temperature",
+                                    "°C", 0, 110, chart=True), temp)
+
+            # Get CPU frequency if available
+            try:
+                frequencies = psutil.cpu_freq(percpu=True) or []
+                for core, freq in enumerate(frequencies):
+                    sample.set(register(f"cpu.core{core}.frequency", f"Core {core} Frequency", "cpu",
+                                        "core_clock", "MHz"), freq.current)
+                if frequencies:
+                    sample.set(self.CPU_FREQUENCY, sum(freq.current for freq in frequencies) / len(frequencies))
+            except:
+                pass
+        except Exception as e:
+            print(f"Error getting CPU info: {e}")
+            sample.text["cpu.name"] = "Error reading CPU info"
+            sample.set(self.CPU_USAGE, 0)
+
+    def get_cpu_temperature(self):
+        """Get CPU temperature safely with fallbacks"""
+        temps = {"CPU": None}
+        if platform.system() == "Windows":
+            try:
+                import wmi
+                w = wmi.WMI(namespace=r"root\OpenHardwareMonitor")
+                temperature_infos = w.Sensor()
+
+                # Collect all CPU temperatures
+                cpu_temps = {}
+                for sensor in temperature_infos:
+                    if sensor.SensorType == 'Temperature' and 'CPU' in sensor.Name:
+                        # Handle multiple cores
+                        cpu_temps[sensor.Name] = float(sensor.Value)
+                if cpu_temps:
+                    return cpu_temps
+                else:
+                    temps["error"] = "OpenHardwareMonitor not detected. Please install and run it first."
+                    return temps
+            except Exception as e:
+                print(f"Error accessing CPU temperature on Windows: {e}")
+
+        elif platform.system() == "Darwin":  # macOS
+            try:
+                # Try osx-cpu-temp first - most reliable on macOS
+                output = subprocess.check_output(["osx-cpu-temp"], text=True, timeout=1)
+                if "°C" in output:
+                    temp_value = float(output.replace("°C", "").strip())
+                    temps["CPU"] = temp_value
+                    return temps
+            except (subprocess.SubprocessError, FileNotFoundError, subprocess.TimeoutExpired):
+                pass
+
+            # Fallback to sysctl
+            try:
+                output = subprocess.check_output(["sysctl", "-a"], text=True, timeout=1)
+                for line in output.splitlines():
+                    if "machdep.xcpm.cpu_thermal_level" in line:
+                        # This provides thermal level, not exact temperature
+                        thermal_level = int(line.split(":")[-1].strip())
+                        # Convert thermal level to estimated temperature (approximation)
+                        estimated_temp = 45 + (thermal_level * 10)
+                        temps["CPU"] = estimated_temp
+                        temps["note"] = "Estimated from thermal level"
+                        return temps
+            except:
+                pass
+
+        return temps
+
+    def read_gpu(self, sample):
+        """Read GPU information safely"""
+        register = self.schema.register
+
+        if self.gpu_monitor is not None and platform.system() != "Darwin":
+            try:
+                devices = self.gpu_monitor.devices()
+            except Exception as e:
+                print(f"Error reading GPU telemetry: {e}")
+                devices = []
+
+            for device in devices:
+                # Keyed by vendor and the vendor's own index: positions in the list shift while
+                # nvidia-smi is starting, stale or restarting, and keys identify history series
+                label = f"{device['vendor']} GPU {device['index']}"
+                prefix = f"gpu.{device['vendor'].lower()}.{device['index']}"
+                sample.text[f"{prefix}.name"] = device["name"]
+
+                sample.set(register(f"{prefix}.temperature", label, "gpu", "temperature", "°C", 0, 110,
+                                    chart=True), device["temperature"])
+                sample.set(register(f"{prefix}.load", f"{label} Load", "gpu", "load", "%", 0, 100, chart=True),
+                           device["load"])
+                sample.set(register(f"{prefix}.memory_used", f"{label} Memory Used", "gpu", "memory", "MiB"),
+                           device["memory_used"])
+                sample.set(register(f"{prefix}.memory_total", f"{label} Memory Total", "gpu", "memory", "MiB"),
+                           device["memory_total"])
+                sample.set(register(f"{prefix}.power", f"{label} Power", "gpu", "power", "W", chart=True),
+                           device["power"])
+                sample.set(register(f"{prefix}.clock", f"{label} Clock", "gpu", "clock", "MHz", chart=True),
+                           device["clock"])
+
+        elif platform.system() == "Darwin":  # macOS
+            try:
+                # Just get basic GPU info without trying for temperatures
+                output = subprocess.check_output(["system_profiler", "SPDisplaysDataType"],
+                                                 text=True, timeout=2)
+
+                # Basic parsing - find GPU names
+                names = []
+                for line in output.splitlines():
+                    line = line.strip()
+                    if "Chipset Model:" in line:
+                        names.append(line.split("Chipset Model:")[1].strip())
+                for position, name in enumerate(names):
+                    sample.text[f"gpu.{position}.name"] = name
+
+                # For Intel integrated GPU, provide basic info
+                if any("Intel" in name for name in names):
+                    sample.text["gpu.message"] = "Temperature data unavailable for Intel integrated GPU"
+                    sample.text["gpu.note"] = "GPU Load: Unknown - Limited API access"
+                    # Registered but never valid, shown as "Not available"
+                    register("gpu.0.temperature", "GPU", "gpu", "temperature", "°C", 0, 110, chart=True)
+            except:
+                pass
+
+    def read_motherboard(self, sample):
+        """Read motherboard/system information safely for Mac"""
+        register = self.schema.register
+
+        if platform.system() == "Darwin":
+            try:
+                # Get Mac model info - always works
+                output = subprocess.check_output(["sysctl", "hw.model"], text=True, timeout=1)
+                if output:
+                    mac_model = output.split(":")[-1].strip()
+                    sample.text["motherboard.model"] = mac_model
+                    sample.text["motherboard.manufacturer"] = "Apple"
+
+                    # For MacBook Pro, add more descriptive model name
+                    if "MacBookPro16,2" in mac_model:
+                        sample.text["motherboard.model_name"] = "MacBook Pro (13-inch, 2020, Intel)"
+            except:
+                pass
+
+            # Get battery information as alternative data point
+            try:
+                batt_info = subprocess.check_output(["pmset", "-g", "batt"], text=True, timeout=1)
+
+                for line in batt_info.splitlines():
+                    if "%" in line:
+                        # Example: "Now drawing from 'Battery Power'" -  (id=) 45%; discharging; 2:32 remaining
+                        parts = line.split(";")
+                        if len(parts) >= 2:
+                            # Get battery percentage
+                            pct_part = parts[0].split("%")[0].strip()
+                            pct = pct_part.split()[-1].strip()
+                            sample.set(register("motherboard.battery.charge", "Battery Charge", "motherboard",
+                                                "charge", "%", 0, 100, chart=True), float(pct))
+
+                            # Get charging status
+                            sample.text["motherboard.battery.status"] = parts[1].strip()
+
+                            # Get remaining time if available
+                            if len(parts) >= 3:
+                                sample.text["motherboard.battery.remaining"] = parts[2].strip()
+            except:
+                pass
+
+            # Instead of trying to get actual temps, add a message about limited access
+            sample.text["motherboard.message"] = "Limited sensor access on MacOS. System health metrics shown instead."
+            # Try different power/thermal metrics that might be available
+            try:
+                power_metrics = [
+                    "machdep.xcpm.pkg_power",  # Intel Macs
+                    "machdep.xcpm.cpu_thermal_level",  # Alternative thermal indicator
+                    "hw.sensors.cpu0.temp0"  # Another possible temperature source
+                ]
+
+                for metric in power_metrics:
+                    try:
+                        output = subprocess.check_output(["sysctl", metric], text=True, timeout=1,
+                                                         stderr=subprocess.DEVNULL)
+                        if output:
+                            value = float(output.split(":")[-1].strip())
+                            sample.set(register("motherboard.power", "System Power", "motherboard", "power",
+                                                "W" if "power" in metric else ""), value)
+                            break  # Found a working metric, stop trying others
+                    except subprocess.CalledProcessError:
+                        # This specific metric doesn't exist, try the next one
+                        continue
+                    except ValueError:
+                        # Couldn't convert to float, try the next one
+                        continue
+            except:
+                # If all attempts fail, just continue without power metrics
+                pass
+
+    def read_cgroups(self, sample):
+        """Read cgroup v2 limits, usage and pressure for our cgroup and its children"""
+        register = self.schema.register
+        try:
+            readings = self.cgroup_monitor.read()
+        except Exception as e:
+            print(f"Error reading cgroup statistics: {e}")
+            return
+
+        # Cgroups that went away take their sensors with them, freeing the ids for new ones
+        for relpath in [relpath for relpath in self._cgroup_keys if relpath not in readings]:
+            self.schema.retire(self._cgroup_keys.pop(relpath))
+
+        for relpath, reading in readings.items():
+            name = relpath or "Cgroup"
+            keys = self._cgroup_keys.setdefault(relpath, set())
+            for metric, value in reading.items():
+                label, kind, unit, scale, chart = CGROUP_METRICS[metric]
+                if relpath:
+                    chart = self.chart_cgroup_children and metric in CHILD_CHARTED_METRICS
+                key = f"cgroup.{relpath or '.'}.{metric}"
+                keys.add(key)
+                sensor_id = register(key, f"{name} {label}", "cgroup", kind,
+                                     unit, 0, 100 if unit == "%" and metric != "cpu_percent" else None, chart)
+                sample.set(sensor_id, value / scale if value is not None else None)
@@ -0,0 +1,290 @@
+import csv
+import glob
+import os
+import shutil
+import subprocess
+import threading
+import time
+
+
+# Fields requested from nvidia-smi, in the order they appear on each CSV line
+NVIDIA_QUERY_FIELDS = (
+    "index",
+    "name",
+    "utilization.gpu",
+    "utilization.memory",
+    "memory.used",
+    "memory.total",
+    "temperature.gpu",
+    "power.draw",
+    "clocks.sm",
+)
+
+# On Windows a console child of a GUI process gets a console window of its own
+POPEN_FLAGS = subprocess.CREATE_NO_WINDOW if os.name == "nt" else 0
+
+# Keys used for the parsed values, matching NVIDIA_QUERY_FIELDS
+NVIDIA_DEVICE_KEYS = (
+    "index",
+    "name",
+    "load",
+    "memory_load",
+    "memory_used",
+    "memory_total",
+    "temperature",
+    "power",
+    "clock",
+)
+
+
+def _parse_number(value):
+    """Convert an nvidia-smi/sysfs field to float, None for N/A style values"""
+    value = value.strip()
+    if not value or value.startswith("[") or value.upper() == "N/A":
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        return None
+
+
+def _read_sysfs(path):
+    """Read a single sysfs attribute, None if it is missing or unreadable"""
+    try:
+        with open(path) as f:
+            return f.read().strip()
+    except OSError:
+        return None
+
+
+def _read_sysfs_number(path, scale=1.0):
+    value = _read_sysfs(path)
+    if value is None:
+        return None
+    number = _parse_number(value)
+    return number / scale if number is not None else None
+
+
+class NvidiaSmiStream:
+    """Keeps one nvidia-smi child running in loop mode and parses its CSV stream on a reader thread
+
+    A watchdog kills a child that stops printing (a wedged driver call is the
+    usual failure), so it is restarted like one that exited.
+    """
+
+    def __init__(self, executable="nvidia-smi", interval_ms=1000, restart_delay=1.0, max_restart_delay=30.0,
+                 stale_after=None):
+        self.executable = executable
+        self.interval_ms = interval_ms
+        self.restart_delay = restart_delay
+        self.max_restart_delay = max_restart_delay
+
+        # Readings older than this are treated as gone (child died, GPU lost), and a child
+        # silent for this long is killed
+        self.stale_after = stale_after if stale_after is not None else max(3 * interval_ms / 1000, 5.0)
+
+        self.restarts = 0
+        self.hangs = 0
+        self.last_error = None
+        self._last_output = 0.0
+        self._hung = False
+
+        self._devices = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        # Held while starting or terminating the child, so stop() cannot slip in between
+        # the reader's stop check and the start of a new child
+        self._process_lock = threading.Lock()
+        self._process = None
+        self._thread = None
+
+    def command(self):
+        return [
+            self.executable,
+            "--query-gpu=" + ",".join(NVIDIA_QUERY_FIELDS),
+            "--format=csv,noheader,nounits",
+            "-lms", str(int(self.interval_ms)),
+        ]
+
+    def start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="nvidia-smi-reader", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=2.0):
+        self._stop.set()
+        with self._process_lock:
+            self._terminate()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def is_running(self):
+        process = self._process
+        return process is not None and process.poll() is None
+
+    def devices(self):
+        """Snapshot of the latest reading for every GPU, ordered by index"""
+        now = time.monotonic()
+        with self._lock:
+            return [dict(device) for index, device in sorted(self._devices.items())
+                    if now - device["updated"] <= self.stale_after]
+
+    def _run(self):
+        delay = self.restart_delay
+        while not self._stop.is_set():
+            started = time.monotonic()
+            try:
+                with self._process_lock:
+                    if self._stop.is_set():
+                        break
+                    self._process = subprocess.Popen(self.command(), stdout=subprocess.PIPE,
+                                                     stderr=subprocess.DEVNULL, text=True, bufsize=1,
+                                                     creationflags=POPEN_FLAGS)
+            except OSError as e:
+                self.last_error = str(e)
+            else:
+                self._last_output = time.monotonic()
+                self._hung = False
+                watchdog = threading.Thread(target=self._watch, args=(self._process,),
+                                            name="nvidia-smi-watchdog", daemon=True)
+                watchdog.start()
+                self._read_stream(self._process)
+                code = self._process.wait()
+                watchdog.join()
+                if self._hung:
+                    self.last_error = f"nvidia-smi printed nothing for {self.stale_after:g} s and was killed"
+                elif not self._stop.is_set():
+                    self.last_error = f"nvidia-smi exited with code {code}"
+
+            if self._stop.is_set():
+                break
+
+            # Back off exponentially while the child keeps failing, reset once it ran for a while
+            if time.monotonic() - started > self.max_restart_delay:
+                delay = self.restart_delay
+            if self._stop.wait(delay):
+                break
+            delay = min(delay * 2, self.max_restart_delay)
+            self.restarts += 1
+
+    def _read_stream(self, process):
+        for line in process.stdout:
+            self._last_output = time.monotonic()
+            if self._stop.is_set():
+                break
+            self.parse_line(line)
+        process.stdout.close()
+
+    def _watch(self, process):
+        """Kill the child if it stays silent for stale_after, which ends the blocked read"""
+        check = min(self.stale_after / 4, 1.0)
+        while not self._stop.wait(check) and process.poll() is None:
+            if time.monotonic() - self._last_output > self.stale_after:
+                self.hangs += 1
+                self._hung = True
+                self._terminate(process)
+                return
+
+    def parse_line(self, line):
+        """Parse one CSV line from nvidia-smi and store it as the latest reading for that GPU"""
+        line = line.strip()
+        if not line:
+            return None
+        fields = next(csv.reader([line], skipinitialspace=True))
+        if len(fields) != len(NVIDIA_QUERY_FIELDS):
+            return None
+
+        index = _parse_number(fields[0])
+        if index is None:
+            # Header line or garbage
+            return None
+
+        device = {"vendor": "NVIDIA", "index": int(index), "name": fields[1].strip()}
+        for key, value in zip(NVIDIA_DEVICE_KEYS[2:], fields[2:]):
+            device[key] = _parse_number(value)
+        device["updated"] = time.monotonic()
+
+        with self._lock:
+            self._devices[device["index"]] = device
+        return device
+
+    def _terminate(self, process=None):
+        process = process or self._process
+        if process is None or process.poll() is not None:
+            return
+        try:
+            process.terminate()
+            process.wait(timeout=1)
+        except subprocess.TimeoutExpired:
+            process.kill()
+        except OSError:
+            pass
+
+
+def read_amdgpu_sysfs(drm_root="/sys/class/drm"):
+    """Read amdgpu telemetry straight from sysfs, no child processes involved"""
+    devices = []
+    for card in sorted(glob.glob(os.path.join(drm_root, "card[0-9]*"))):
+        # Skip connectors such as card0-DP-1
+        if "-" in os.path.basename(card):
+            continue
+
+        device_dir = os.path.join(card, "device")
+        load = _read_sysfs_number(os.path.join(device_dir, "gpu_busy_percent"))
+        if load is None:
+            # Not an amdgpu device
+            continue
+
+        device = {
+            "vendor": "AMD",
+            "index": int(os.path.basename(card)[4:]),  # DRM card number, stable while the card is present
+            "name": _read_sysfs(os.path.join(device_dir, "product_name")) or f"AMD GPU ({os.path.basename(card)})",
+            "load": load,
+            "memory_load": _read_sysfs_number(os.path.join(device_dir, "mem_busy_percent")),
+            "memory_used": _read_sysfs_number(os.path.join(device_dir, "mem_info_vram_used"), 1024 * 1024),
+            "memory_total": _read_sysfs_number(os.path.join(device_dir, "mem_info_vram_total"), 1024 * 1024),
+            "temperature": None,
+            "power": None,
+            "clock": None,
+        }
+
+        hwmons = sorted(glob.glob(os.path.join(device_dir, "hwmon", "hwmon*")))
+        if hwmons:
+            hwmon = hwmons[0]
+            # hwmon reports millidegrees, microwatts and Hz
+            device["temperature"] = _read_sysfs_number(os.path.join(hwmon, "temp1_input"), 1000)
+            device["power"] = (_read_sysfs_number(os.path.join(hwmon, "power1_average"), 1e6)
+                               or _read_sysfs_number(os.path.join(hwmon, "power1_input"), 1e6))
+            device["clock"] = _read_sysfs_number(os.path.join(hwmon, "freq1_input"), 1e6)
+
+        devices.append(device)
+    return devices
+
+
+class GPUMonitor:
+    """Collects GPU telemetry from a persistent nvidia-smi stream and amdgpu sysfs"""
+
+    def __init__(self, interval_ms=1000, nvidia_smi="nvidia-smi", drm_root="/sys/class/drm"):
+        self.drm_root = drm_root
+        self.nvidia = None
+
+        if nvidia_smi and shutil.which(nvidia_smi):
+            self.nvidia = NvidiaSmiStream(nvidia_smi, interval_ms=interval_ms)
+
+    def start(self):
+        if self.nvidia is not None:
+            self.nvidia.start()
+
+    def stop(self):
+        if self.nvidia is not None:
+            self.nvidia.stop()
+
+    def devices(self):
+        """Latest readings for all GPUs; NVIDIA devices first, then amdgpu ones"""
+        devices = self.nvidia.devices() if self.nvidia is not None else []
+        if os.path.isdir(self.drm_root):
+            devices.extend(read_amdgpu_sysfs(self.drm_root))
+        return devices
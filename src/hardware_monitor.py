@@ -1,247 +1,195 @@
-import psutil
-import platform
-import cpuinfo
-from PySide6.QtCore import QObject, Signal, QTimer, QThread, QMutex
+from PySide6.QtCore import QObject, Signal, QTimer, QThread
 import time
-import subprocess
 import threading
 
+from src.collectors import SensorCollector
+from src.collector_process import CollectorSupervisor
+from src.history import SensorHistory
+from src.sensor_statistics import SensorStatistics
+from src.sample import Sample, SensorSchema
+from src.sample_mailbox import SampleMailbox
+
+
+# Minimum spacing between two UI updates, about one frame at 60 Hz
+FRAME_INTERVAL = 16  # ms
+
 
 class SensorWorker(QThread):
     """Worker thread to handle sensor data collection without blocking UI"""
-    data_ready = Signal(dict)
+    # Emitted only when the mailbox goes from empty to full, never once per sample
+    sample_pending = Signal()
 
-    def __init__(self):
+    def __init__(self, mailbox=None, history=None, schema=None, collector_options=None, collector_factory=None):
         super().__init__()
-        self.mutex = QMutex()
+        self.mailbox = mailbox if mailbox is not None else SampleMailbox()
+        self.history = history
+        self.statistics = None
+        self.schema = schema if schema is not None else SensorSchema()
+        self.collector_options = collector_options or {}
+        self.collector_factory = collector_factory or SensorCollector
         self.abort = False
         self.interval = 1000  # ms
+        self.collector = None
+
+        # Guards abort/refresh requests; notified to cut a wait short
+        self._wakeup = threading.Condition()
+        self._refresh_requested = False
+
+        # Sampling counters
+        self.samples = 0
+        self.refreshes = 0
+        self.overruns = 0  # scheduled ticks skipped because collection ran past them
 
     def run(self):
-        while not self.abort:
-            # Collect data in background thread
-            data = self.collect_data()
-            self.data_ready.emit(data)
-            time.sleep(self.interval / 1000)
+        self.collector = self.collector_factory(interval_ms=self.interval, schema=self.schema,
+                                                **self.collector_options)
+        self.collector.start()
+        try:
+            next_tick = time.monotonic()
+            while True:
+                reason = self._wait_until(next_tick)
+                if reason == "abort":
+                    break
+
+                # Collect data in background thread
+                sample = self.collect_data()
+                self.publish(sample)
+                self.samples += 1
+
+                if reason == "tick":
+                    # Schedule against absolute deadlines so collection time never adds to the period
+                    period = self.interval / 1000
+                    next_tick += period
+                    late = time.monotonic() - next_tick
+                    if late > 0:
+                        missed = int(late // period) + 1
+                        self.overruns += missed
+                        next_tick += missed * period
+        finally:
+            self.collector.stop()
+
+    def _wait_until(self, deadline):
+        """Block until the deadline, a refresh request or stop; returns which one happened"""
+        with self._wakeup:
+            while not self.abort and not self._refresh_requested:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return "tick"
+                self._wakeup.wait(remaining)
+
+            if self.abort:
+                return "abort"
+            self._refresh_requested = False
+            self.refreshes += 1
+            return "refresh"
+
+    def request_refresh(self):
+        """Collect a sample right away, outside the regular cadence"""
+        with self._wakeup:
+            self._refresh_requested = True
+            self._wakeup.notify_all()
+
+    def collect_data(self):
+        """Collect all sensor data - runs in background thread"""
+        return self.collector.collect_data()
+
+    def publish(self, sample):
+        """Hand a sample to the UI without queueing an event per sample"""
+        # History and statistics want every sample, so record before the mailbox coalesces them
+        if self.history is not None:
+            self.history.record(sample)
+        if self.statistics is not None:
+            self.statistics.record(sample)
+        if self.mailbox.post(sample):
+            self.sample_pending.emit()
 
     def stop(self):
-        self.mutex.lock()
-        self.abort = True
-        self.mutex.unlock()
+        with self._wakeup:
+            self.abort = True
+            self._wakeup.notify_all()
         self.wait()
 
-    def collect_data(self):
-        """Collect all sensor data - runs in background thread"""
-        data = {
-            "timestamp": time.time(),
-            "cpu": self.get_cpu_info(),
-            "gpu": self.get_gpu_info(),
-            "motherboard": self.get_motherboard_info()
-        }
-        return data
 
-    def get_cpu_info(self):
-        """Get CPU information safely"""
+class IsolatedSensorWorker(SensorWorker):
+    """Follows samples published by a supervised collector process instead of probing in-process"""
+    # How often the shared ring is checked for new slots; reading its header costs next to nothing
+    POLL_INTERVAL = 0.05  # s
+
+    def __init__(self, mailbox=None, history=None, schema=None, collector_options=None, collector_factory=None,
+                 supervisor=None):
+        super().__init__(mailbox, history, schema, collector_options)
+        self.collector_factory = collector_factory
+        self.supervisor = supervisor
+        self.lost = 0  # samples overwritten in the ring before they could be read
+
+    def run(self):
+        if self.supervisor is None:
+            self.supervisor = CollectorSupervisor(interval_ms=self.interval, collector_factory=self.collector_factory,
+                                                  collector_options=self.collector_options)
+        self.supervisor.start()
+        ring = self.supervisor.ring
+        sample = Sample(self.schema)
+        next_seq = 0
         try:
-            cpu_info = cpuinfo.get_cpu_info()
-            cpu_data = {
-                "name": cpu_info.get('brand_raw', "Unknown CPU"),
-                "usage_percent": psutil.cpu_percent(interval=None, percpu=True),
-                "overall_usage": psutil.cpu_percent(interval=None),
-                "core_count": psutil.cpu_count(logical=False),
-                "thread_count": psutil.cpu_count(logical=True)
-            }
-
-            # Get CPU temperature with timeout safety
-            try:
-                cpu_data["temperature"] = self.get_cpu_temperature()
-            except:
-                cpu_data["temperature"] = {"CPU": None}
-
-            # Get CPU frequency if available
-            try:
-                cpu_data["frequency"] = psutil.cpu_freq(percpu=True)
-            except:
-                cpu_data["frequency"] = None
-
-            return cpu_data
-        except Exception as e:
-            print(f"Error getting CPU info: {e}")
-            return {"name": "Error reading CPU info", "overall_usage": 0}
-
-    def get_cpu_temperature(self):
-        """Get CPU temperature safely with fallbacks"""
-        temps = {"CPU": None}
-        if platform.system() == "Windows":
-            try:
-                import wmi
-                w = wmi.WMI(namespace=r"root\OpenHardwareMonitor")
-                temperature_infos = w.Sensor()
-
-                # Collect all CPU temperatures
-                cpu_temps = {}
-                for sensor in temperature_infos:
-                    if sensor.SensorType == 'Temperature' and 'CPU' in sensor.Name:
-                        # Handle multiple cores
-                        cpu_temps[sensor.Name] = float(sensor.Value)
-                if cpu_temps:
-                    return cpu_temps
-                else:
-                    temps["error"] = "OpenHardwareMonitor not detected. Please install and run it first."
-                    return temps
-            except Exception as e:
-                print(f"Error accessing CPU temperature on Windows: {e}")
-
-        elif platform.system() == "Darwin":  # macOS
-            try:
-                # Try osx-cpu-temp first - most reliable on macOS
-                output = subprocess.check_output(["osx-cpu-temp"], text=True, timeout=1)
-                if "°C" in output:
-                    temp_value = float(output.replace("°C", "").strip())
-                    temps["CPU"] = temp_value
-                    return temps
-            except (subprocess.SubprocessError, FileNotFoundError, subprocess.TimeoutExpired):
-                pass
-
-            # Fallback to sysctl
-            try:
-                output = subprocess.check_output(["sysctl", "-a"], text=True, timeout=1)
-                for line in output.splitlines():
-                    if "machdep.xcpm.cpu_thermal_level" in line:
-                        # This provides thermal level, not exact temperature
-                        thermal_level = int(line.split(":")[-1].strip())
-                        # Convert thermal level to estimated temperature (approximation)
-                        estimated_temp = 45 + (thermal_level * 10)
-                        temps["CPU"] = estimated_temp
-                        temps["note"] = "Estimated from thermal level"
-                        return temps
-            except:
-                pass
-
-        return temps
-
-    def get_gpu_info(self):
-        """Get GPU information safely for Mac"""
-        gpu_data = {"available": False}
-
-        if platform.system() == "Darwin":  # macOS
-            try:
-                # Just get basic GPU info without trying for temperatures
-                output = subprocess.check_output(["system_profiler", "SPDisplaysDataType"],
-                                                 text=True, timeout=2)
-
-                if output:
-                    gpu_data["available"] = True
-                    gpu_data["devices"] = []
-
-                    # Basic parsing - find GPU name
-                    current_gpu = {}
-                    for line in output.splitlines():
-                        line = line.strip()
-                        if "Chipset Model:" in line:
-                            current_gpu = {"name": line.split("Chipset Model:")[1].strip()}
-                            gpu_data["devices"].append(current_gpu)
-                        elif "VRAM" in line and current_gpu:
-                            current_gpu["vram"] = line.split(":")[-1].strip()
-
-                    # For Intel integrated GPU, provide basic info
-                    if any("Intel" in device.get("name", "") for device in gpu_data.get("devices", [])):
-                        gpu_data["message"] = "Temperature data unavailable for Intel integrated GPU"
-                        gpu_data["temperature"] = {"GPU": None}
-
-                        # Add some basic GPU utilization info
-                        gpu_data["utilization"] = {"GPU Load": "Unknown - Limited API access"}
-            except:
-                pass
-
-        return gpu_data
-
-    def get_motherboard_info(self):
-        """Get motherboard/system information safely for Mac"""
-        mb_data = {"sensors": {}}
-
-        if platform.system() == "Darwin":
-            try:
-                # Get Mac model info - always works
-                output = subprocess.check_output(["sysctl", "hw.model"], text=True, timeout=1)
-                if output:
-                    mac_model = output.split(":")[-1].strip()
-                    mb_data["model"] = mac_model
-                    mb_data["manufacturer"] = "Apple"
-
-                    # For MacBook Pro, add more descriptive model name
-                    if "MacBookPro16,2" in mac_model:
-                        mb_data["model_name"] = "MacBook Pro (13-inch, 2020, Intel)"
-            except:
-                pass
-
-            # Get battery information as alternative data point
-            try:
-                batt_info = subprocess.check_output(["pmset", "-g", "batt"], text=True, timeout=1)
-                mb_data["battery"] = {}
-
-                for line in batt_info.splitlines():
-                    if "%" in line:
-                        # Example: "Now drawing from 'Battery Power'" -  (id=) 45%; discharging; 2:32 remaining
-                        parts = line.split(";")
-                        if len(parts) >= 2:
-                            # Get battery percentage
-                            pct_part = parts[0].split("%")[0].strip()
-                            pct = pct_part.split()[-1].strip()
-                            mb_data["battery"]["charge"] = f"{pct}%"
-
-                            # Get charging status
-                            status = parts[1].strip()
-                            mb_data["battery"]["status"] = status
-
-                            # Get remaining time if available
-                            if len(parts) >= 3:
-                                remaining = parts[2].strip()
-                                mb_data["battery"]["remaining"] = remaining
-            except:
-                pass
-
-            # Instead of trying to get actual temps, add a message about limited access
-            mb_data["message"] = "Limited sensor access on MacOS. System health metrics shown instead."
-            # Try different power/thermal metrics that might be available
-            try:
-                power_metrics = [
-                    "machdep.xcpm.pkg_power",  # Intel Macs
-                    "machdep.xcpm.cpu_thermal_level",  # Alternative thermal indicator
-                    "hw.sensors.cpu0.temp0"  # Another possible temperature source
-                ]
-
-                for metric in power_metrics:
-                    try:
-                        output = subprocess.check_output(["sysctl", metric], text=True, timeout=1,
-                                                         stderr=subprocess.DEVNULL)
-                        if output:
-                            value = float(output.split(":")[-1].strip())
-                            mb_data["power"] = {"System Power": f"{value:.2f} W" if "power" in metric else f"{value:.1f}"}
-                            break  # Found a working metric, stop trying others
-                    except subprocess.CalledProcessError:
-                        # This specific metric doesn't exist, try the next one
+            while self._wait_until(time.monotonic() + self.POLL_INTERVAL) != "abort":
+                write_seq = ring.write_seq()
+                if write_seq - next_seq > ring.slot_count:
+                    self.lost += write_seq - ring.slot_count - next_seq
+                    next_seq = write_seq - ring.slot_count
+
+                for seq in range(next_seq, write_seq):
+                    if not ring.read_sample(seq, sample):
+                        self.lost += 1
                         continue
-                    except ValueError:
-                        # Couldn't convert to float, try the next one
-                        continue
-            except:
-                # If all attempts fail, just continue without power metrics
-                pass
-        return mb_data
+                    self.publish(sample)
+                    self.samples += 1
+                next_seq = write_seq
+        finally:
+            self.supervisor.stop()
+
+    def request_refresh(self):
+        """Ask the collector process for a sample right away"""
+        if self.supervisor is not None:
+            self.supervisor.request_refresh()
+            self.refreshes += 1
 
 
 class HardwareMonitor(QObject):
-    data_updated = Signal(dict)
+    # Carries a Sample that stays valid until the next emission
+    data_updated = Signal(object)
 
-    def __init__(self, update_interval=1000):
+    def __init__(self, update_interval=1000, isolated=False, collector_options=None, collector_factory=None):
         super().__init__()
         self.update_interval = update_interval
-
-        # Create background worker thread for sensor data
-        self.worker = SensorWorker()
+        self.isolated = isolated
+
+        # Registry of every sensor seen so far, shared by collection and display
+        self.schema = SensorSchema()
+
+        # Numeric readings kept over time for the History tab
+        self.history = SensorHistory()
+
+        # Streaming per-sensor statistics (moving averages, windowed min/max and percentiles)
+        self.statistics = SensorStatistics()
+
+        # Latest-sample slot shared with the worker, drained at most once per frame
+        self.mailbox = SampleMailbox()
+        self._last_drain = 0.0
+        self._drain_timer = QTimer(self)
+        self._drain_timer.setSingleShot(True)
+        self._drain_timer.timeout.connect(self.drain)
+
+        # Create background worker thread for sensor data; in isolated mode the probes
+        # run in a supervised child process and the worker only reads shared memory
+        if isolated:
+            self.worker = IsolatedSensorWorker(self.mailbox, self.history, self.schema, collector_options,
+                                               collector_factory)
+        else:
+            self.worker = SensorWorker(self.mailbox, self.history, self.schema, collector_options,
+                                       collector_factory)
         self.worker.interval = update_interval
-        self.worker.data_ready.connect(self.on_data_ready)
+        self.worker.statistics = self.statistics
+        self.worker.sample_pending.connect(self.on_sample_pending)
 
     def start(self):
         self.worker.start()
@@ -249,11 +197,39 @@ class HardwareMonitor(QObject):
     def stop(self):
         self.worker.stop()
 
-    def on_data_ready(self, data):
-        # This runs in the main thread, safe to emit signals
-        self.data_updated.emit(data)
+    def on_sample_pending(self):
+        # This runs in the main thread; schedule a drain no sooner than one frame after the last
+        if self._drain_timer.isActive():
+            return
+        elapsed = (time.monotonic() - self._last_drain) * 1000
+        self._drain_timer.start(max(0, int(FRAME_INTERVAL - elapsed)))
+
+    def drain(self):
+        """Deliver the latest (possibly merged) sample to the UI"""
+        self._last_drain = time.monotonic()
+        sample = self.mailbox.take()
+        if sample is not None:
+            self.data_updated.emit(sample)
+
+    def transport_stats(self):
+        """Counts of posted, delivered, merged and dropped samples"""
+        return self.mailbox.stats()
+
+    def sampling_stats(self):
+        """Counts of collected samples, on-demand refreshes and overrun ticks"""
+        stats = {
+            "interval": self.worker.interval,
+            "samples": self.worker.samples,
+            "refreshes": self.worker.refreshes,
+            "overruns": self.worker.overruns,
+        }
+        if self.isolated:
+            stats["lost"] = self.worker.lost
+            if self.worker.supervisor is not None:
+                stats["restarts"] = self.worker.supervisor.restarts
+        return stats
 
     def update_data(self):
-        # This is now a no-op as data collection happens in the background thread
-        pass
+        # Wake the worker for an immediate out-of-band sample
+        self.worker.request_refresh()
 
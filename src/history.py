@@ -0,0 +1,199 @@
+import bisect
+import threading
+from array import array
+
+from src.sample import SensorMap
+from src.utils.downsample import bucket_width_for, minmax_buckets
+
+
+# One week of samples at the default 1 s interval
+DEFAULT_MAX_SAMPLES = 7 * 24 * 3600
+
+# Number of zoom levels kept in the decimation cache of each series
+MAX_CACHED_LEVELS = 6
+
+
+class _DecimatedLevel:
+    """Closed min/max buckets of one series at one zoom level, over a contiguous run of samples
+
+    Buckets live in flat arrays rather than per-bucket tuples: `keys` holds the
+    bucket indices and `points` four doubles per bucket, the time and value of
+    its two extremes in time order (repeated when the bucket has one point).
+    """
+    __slots__ = ("keys", "points", "start", "consumed")
+
+    def __init__(self, start):
+        self.keys = array('q')  # bucket indices, ascending
+        self.points = array('d')  # t0, v0, t1, v1 per bucket
+        self.start = start  # absolute index of the first sample covered
+        self.consumed = start  # absolute index of the first sample not in a closed bucket
+
+    def __len__(self):
+        return len(self.keys)
+
+    def drop_front(self, count):
+        del self.keys[:count]
+        del self.points[:4 * count]
+
+
+class HistorySeries:
+    """Time series of one sensor, stored in flat arrays with a cached decimation per zoom level"""
+
+    def __init__(self, name, unit="", max_samples=DEFAULT_MAX_SAMPLES):
+        self.name = name
+        self.unit = unit
+        self.max_samples = max_samples
+
+        self.times = array('d')
+        self.values = array('d')
+
+        # Samples trimmed from the front so far; absolute index = dropped + local index
+        self.dropped = 0
+
+        self._levels = {}
+
+    def __len__(self):
+        return len(self.times)
+
+    def append(self, timestamp, value):
+        if self.times and timestamp <= self.times[-1]:
+            # Keep timestamps strictly increasing so bisect and bucketing stay valid
+            return
+        self.times.append(timestamp)
+        self.values.append(value)
+
+        # Trim in chunks so the front deletion cost is amortised over many appends
+        if len(self.times) > self.max_samples + max(self.max_samples // 10, 1):
+            self._trim()
+
+    def _trim(self):
+        excess = len(self.times) - self.max_samples
+        del self.times[:excess]
+        del self.values[:excess]
+        self.dropped += excess
+
+        # Buckets overlapping the trimmed range are no longer complete
+        first = self.times[0]
+        for width, level in list(self._levels.items()):
+            level.drop_front(bisect.bisect_right(level.keys, int(first // width)))
+            if not level.keys:
+                del self._levels[width]
+                continue
+            # The level now starts at its first whole bucket; samples before it are not covered
+            level.start = self.dropped + bisect.bisect_left(self.times, level.keys[0] * width)
+
+    def decimate(self, start, end, pixels):
+        """Points to draw for the [start, end] time range at about `pixels` horizontal resolution
+
+        Ranges that already fit the resolution are returned raw. Otherwise the
+        closed buckets come from the cache for the matching zoom level, which
+        covers the visible range only and is only extended with samples that
+        arrived since the last call; just the still-open newest bucket is
+        computed from raw samples. Work and cache size follow the pixel width,
+        not the length of the history.
+        """
+        lo = bisect.bisect_left(self.times, start)
+        hi = bisect.bisect_right(self.times, end)
+        if hi - lo <= 2 * pixels:
+            return list(zip(self.times[lo:hi], self.values[lo:hi]))
+
+        width = bucket_width_for(end - start, pixels)
+        level = self._level(width, lo)
+        # The bucket holding the last visible sample is open, or cut short by `end`
+        open_bucket = int(self.times[hi - 1] // width)
+        open_start = bisect.bisect_left(self.times, open_bucket * width, lo)
+        self._extend(level, width, open_start)
+
+        # Keep about two screens of buckets; older ones have scrolled out of view
+        first_visible = bisect.bisect_left(level.keys, int(start // width))
+        if len(level) > 2 * pixels and first_visible:
+            level.drop_front(first_visible)
+            level.start = self.dropped + bisect.bisect_left(self.times, level.keys[0] * width)
+            first_visible = 0
+
+        points = []
+        last = bisect.bisect_left(level.keys, open_bucket)
+        cached = level.points
+        for offset in range(4 * first_visible, 4 * last, 4):
+            t0, v0, t1, v1 = cached[offset:offset + 4]
+            points.append((t0, v0))
+            if t1 != t0:
+                points.append((t1, v1))
+
+        tail = max(min(level.consumed - self.dropped, open_start), lo)
+        for _, bucket_points in minmax_buckets(self.times, self.values, tail, hi, width):
+            points.extend(bucket_points)
+        return points
+
+    def _level(self, width, lo):
+        """Cache for one zoom level, restarted at the visible range if it does not reach it"""
+        # First sample of the bucket the visible range starts in
+        bucket_start = bisect.bisect_left(self.times, int(self.times[lo] // width) * width)
+        level = self._levels.pop(width, None)
+        if level is None or not level.start - self.dropped <= bucket_start <= level.consumed - self.dropped:
+            level = _DecimatedLevel(self.dropped + bucket_start)
+            if len(self._levels) >= MAX_CACHED_LEVELS:
+                # Evict the least recently used zoom level
+                del self._levels[next(iter(self._levels))]
+        self._levels[width] = level
+        return level
+
+    def _extend(self, level, width, close_end):
+        """Close the buckets of the samples up to local index `close_end`"""
+        start = level.consumed - self.dropped
+        if close_end <= start:
+            return
+
+        for key, bucket_points in minmax_buckets(self.times, self.values, start, close_end, width):
+            level.keys.append(key)
+            level.points.extend(bucket_points[0] + bucket_points[-1])
+        level.consumed = self.dropped + close_end
+
+
+class SensorHistory:
+    """Thread-safe store of sensor readings over time for every sensor flagged for charting"""
+
+    def __init__(self, max_samples=DEFAULT_MAX_SAMPLES):
+        self.max_samples = max_samples
+        self._series = SensorMap(lambda sensor: sensor.title if sensor.chart else None)  # title -> HistorySeries
+        self._lock = threading.Lock()
+
+    def record(self, sample):
+        """Append the valid charted readings of a Sample"""
+        if not sample.timestamp:
+            return
+
+        with self._lock:
+            by_id = self._series.sync(sample.schema)
+            for sensor, value in sample.items():
+                series = by_id[sensor.id]
+                if series is None:
+                    # Series are created on the first valid reading, so sensors that never report stay hidden
+                    series = self._series.resolve(sensor, self._new_series)
+                    if series is None:
+                        continue
+                series.append(sample.timestamp, value)
+
+    def _new_series(self, sensor):
+        return HistorySeries(sensor.title, sensor.unit, self.max_samples)
+
+    def series_names(self):
+        with self._lock:
+            return list(self._series)
+
+    def unit(self, name):
+        with self._lock:
+            series = self._series.get(name)
+            return series.unit if series is not None else ""
+
+    def latest_time(self):
+        with self._lock:
+            times = [series.times[-1] for series in self._series.values() if series.times]
+        return max(times) if times else None
+
+    def decimate(self, name, start, end, pixels):
+        with self._lock:
+            series = self._series.get(name)
+            if series is None:
+                return []
+            return series.decimate(start, end, pixels)
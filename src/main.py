@@ -1,17 +1,47 @@
 import sys
+import multiprocessing
 from PySide6.QtWidgets import QApplication
 from PySide6.QtCore import QTimer
 from src.ui.main_window import MainWindow
 
 
+def collector_options_from_args(argv):
+    """Collector options from the command line
+
+    --cgroup               report cgroup v2 limits and usage of our own cgroup
+    --cgroup-children      also report every cgroup below it
+    --cgroup-chart-children  report every cgroup below it and chart their CPU and memory usage
+    --cgroup-root=PATH     cgroup v2 mount point (default /sys/fs/cgroup)
+    """
+    options = {}
+    cgroup = None
+    for arg in argv[1:]:
+        if arg in ("--cgroup", "--cgroup-children", "--cgroup-chart-children") or arg.startswith("--cgroup-root="):
+            cgroup = cgroup or {}
+        if arg in ("--cgroup-children", "--cgroup-chart-children"):
+            cgroup["include_children"] = True
+            if arg == "--cgroup-chart-children":
+                options["chart_cgroup_children"] = True
+        elif arg.startswith("--cgroup-root="):
+            cgroup["root"] = arg.split("=", 1)[1]
+    if cgroup is not None:
+        options["cgroup"] = cgroup
+    return options
+
+
 def main():
+    # Needed for the isolated collector process in frozen builds
+    multiprocessing.freeze_support()
+
     # Initialize the application
     app = QApplication(sys.argv)
     app.setApplicationName("PCPulse")
     app.setApplicationDisplayName("PCPulse Hardware Monitor")
 
     # Create main window
-    window = MainWindow()
+    # --isolated runs sensor collection in a separate, supervised process
+    window = MainWindow(isolated_collector="--isolated" in sys.argv,
+                        collector_options=collector_options_from_args(sys.argv))
     window.show()
 
     # Use a timer to keep event loop responsive
@@ -0,0 +1,262 @@
+import threading
+from array import array
+
+
+# Formatting per unit, applied only where values are displayed
+UNIT_FORMATS = {
+    "%": "{:.0f}%",
+    "°C": "{:.1f}°C",
+    "MHz": "{:.0f} MHz",
+    "MiB": "{:.0f} MiB",
+    "MiB/s": "{:.2f} MiB/s",
+    "cores": "{:.2f} cores",
+    "W": "{:.2f} W",
+    "": "{:g}",
+}
+
+
+class SensorInfo:
+    """Static description of one sensor, registered once per schema"""
+    __slots__ = ("id", "key", "label", "section", "kind", "unit", "low", "high", "chart")
+
+    def __init__(self, id, key, label, section, kind, unit="", low=None, high=None, chart=False):
+        self.id = id
+        self.key = key
+        self.label = label
+        self.section = section  # "cpu", "gpu", "motherboard" or "cgroup"
+        self.kind = kind  # "load", "temperature", "clock", "power", "memory", "charge", "count", ...
+        self.unit = unit
+        self.low = low
+        self.high = high
+        self.chart = chart  # recorded into history
+
+    @property
+    def title(self):
+        """Standalone name, e.g. for history series; temperatures are labelled by sensor name only"""
+        return f"{self.label} Temperature" if self.kind == "temperature" else self.label
+
+    def format(self, value):
+        return UNIT_FORMATS.get(self.unit, "{:g} " + self.unit).format(value)
+
+    def to_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+class SensorSchema:
+    """Registry giving every sensor a stable integer id
+
+    Ids index straight into Sample value vectors. Registering an existing key
+    returns its id without touching the schema, so collectors can call
+    `register` on every tick for sensors that appear dynamically. Sensors
+    that go away for good (e.g. a removed cgroup) are retired: their id is
+    freed for reuse and consumers drop what they kept for them when
+    `retirements` changes.
+    """
+
+    def __init__(self):
+        self.sensors = []  # id -> SensorInfo, None for retired ids awaiting reuse
+        self._ids = {}
+        self._free = []
+        self._lock = threading.Lock()
+
+        # Change counters: `version` counts registrations and retirements, `retirements` only the latter
+        self.version = 0
+        self.retirements = 0
+
+    def __len__(self):
+        return len(self.sensors)
+
+    def register(self, key, label, section, kind, unit="", low=None, high=None, chart=False):
+        sensor_id = self._ids.get(key)
+        if sensor_id is not None:
+            return sensor_id
+        with self._lock:
+            sensor_id = self._ids.get(key)
+            if sensor_id is None:
+                if self._free:
+                    sensor_id = self._free.pop()
+                    self.sensors[sensor_id] = SensorInfo(sensor_id, key, label, section, kind, unit, low, high, chart)
+                else:
+                    sensor_id = len(self.sensors)
+                    self.sensors.append(SensorInfo(sensor_id, key, label, section, kind, unit, low, high, chart))
+                self._ids[key] = sensor_id
+                self.version += 1
+            return sensor_id
+
+    def retire(self, keys):
+        """Forget sensors that will not report again, freeing their ids"""
+        with self._lock:
+            retired = False
+            for key in keys:
+                sensor_id = self._ids.pop(key, None)
+                if sensor_id is not None:
+                    self.sensors[sensor_id] = None
+                    self._free.append(sensor_id)
+                    retired = True
+            if retired:
+                self.version += 1
+                self.retirements += 1
+
+    def register_info(self, info):
+        """Register a sensor described by a SensorInfo.to_dict() mapping, keeping our own id"""
+        info = dict(info)
+        info.pop("id", None)
+        return self.register(**info)
+
+    def id(self, key):
+        return self._ids.get(key)
+
+    def get(self, key):
+        sensor_id = self._ids.get(key)
+        return self.sensors[sensor_id] if sensor_id is not None else None
+
+    def section(self, section, kind=None):
+        """Sensors of one dashboard section, optionally of a single kind, in registration order"""
+        return [sensor for sensor in list(self.sensors)
+                if sensor is not None and sensor.section == section and (kind is None or sensor.kind == kind)]
+
+
+class SensorMap(dict):
+    """Per-sensor objects of one consumer (history series, statistics), by name with lookup by id
+
+    Objects are kept under a name derived from the sensor (its key or title),
+    which stays meaningful when ids do not, and resolved from ids lazily. When
+    the schema retires sensors, objects whose name no live sensor has anymore
+    are dropped and ids are resolved again, since retired ids may have been
+    reused.
+    """
+
+    def __init__(self, name_of):
+        super().__init__()
+        self.name_of = name_of  # SensorInfo -> name, None for sensors the consumer does not keep
+        self._by_id = []  # sensor id -> object, None until resolved
+        self._retirements = 0  # schema retirements already pruned
+
+    def sync(self, schema):
+        """Prune retired sensors and return the id lookup list, sized for `schema`"""
+        if schema.retirements != self._retirements:
+            self._retirements = schema.retirements
+            names = {self.name_of(sensor) for sensor in list(schema.sensors) if sensor is not None}
+            for name in [name for name in self if name not in names]:
+                del self[name]
+            self._by_id = []
+        by_id = self._by_id
+        if len(by_id) < len(schema):
+            by_id.extend([None] * (len(schema) - len(by_id)))
+        return by_id
+
+    def resolve(self, sensor, create):
+        """Object of a sensor not resolved yet, created by `create(sensor)` on first use; None if not kept"""
+        name = self.name_of(sensor)
+        if name is None:
+            return None
+        obj = self.get(name)
+        if obj is None:
+            obj = self[name] = create(sensor)
+        self._by_id[sensor.id] = obj
+        return obj
+
+
+class Sample:
+    """One tick of readings: a float64 value vector indexed by sensor id plus a validity bitmap
+
+    Collectors fill a preallocated Sample in place each tick; consumers copy or
+    merge it into their own buffers instead of building new containers. Free
+    text that genuinely changes at runtime (names, battery status) lives in
+    the small `text` dict.
+    """
+    __slots__ = ("schema", "timestamp", "values", "valid", "text")
+
+    def __init__(self, schema):
+        self.schema = schema
+        self.timestamp = 0.0
+        self.values = array('d')
+        self.valid = bytearray()
+        self.text = {}
+        self.reserve(len(schema))
+
+    def reserve(self, size):
+        """Grow the vectors to hold at least `size` sensors"""
+        missing = size - len(self.values)
+        if missing > 0:
+            self.values.frombytes(bytes(8 * missing))
+            self.valid.extend(bytes((size + 7) // 8 - len(self.valid)))
+
+    def clear(self):
+        """Invalidate every reading, keeping the allocated vectors"""
+        self.valid[:] = bytes(len(self.valid))
+        self.text.clear()
+        self.timestamp = 0.0
+
+    def set(self, sensor_id, value):
+        if value is None:
+            self.invalidate(sensor_id)
+            return
+        if sensor_id >= len(self.values):
+            self.reserve(max(sensor_id + 1, len(self.schema)))
+        self.values[sensor_id] = value
+        self.valid[sensor_id >> 3] |= 1 << (sensor_id & 7)
+
+    def invalidate(self, sensor_id):
+        if sensor_id < len(self.values):
+            self.valid[sensor_id >> 3] &= ~(1 << (sensor_id & 7)) & 0xFF
+
+    def is_valid(self, sensor_id):
+        return sensor_id < len(self.values) and bool(self.valid[sensor_id >> 3] & (1 << (sensor_id & 7)))
+
+    def get(self, sensor_id, default=None):
+        if self.is_valid(sensor_id):
+            return self.values[sensor_id]
+        return default
+
+    def value(self, key, default=None):
+        """Reading by sensor key, for the few places that look sensors up by name"""
+        sensor_id = self.schema.id(key)
+        return self.get(sensor_id, default) if sensor_id is not None else default
+
+    def items(self):
+        """(SensorInfo, value) for every valid reading"""
+        sensors = self.schema.sensors
+        for sensor_id in range(min(len(self.values), len(sensors))):
+            if self.valid[sensor_id >> 3] & (1 << (sensor_id & 7)):
+                sensor = sensors[sensor_id]
+                if sensor is not None:
+                    yield sensor, self.values[sensor_id]
+
+    def copy_from(self, other):
+        """Overwrite this sample with another one of the same schema, reusing our buffers"""
+        self.reserve(len(other.values))
+        self.values[:len(other.values)] = other.values
+        self.valid[:] = bytes(len(self.valid))
+        self.valid[:len(other.valid)] = other.valid
+        self.text.clear()
+        self.text.update(other.text)
+        self.timestamp = other.timestamp
+
+    def merge_from(self, other):
+        """Take every valid reading of a newer sample, keep ours where it has none
+
+        Returns True when the newer sample covered all of our readings, i.e.
+        nothing of this one survives the merge.
+        """
+        self.reserve(len(other.values))
+        covered = True
+        for index, bits in enumerate(other.valid):
+            mine = self.valid[index]
+            if mine & ~bits:
+                covered = False
+            if bits:
+                for bit in range(8):
+                    if bits & (1 << bit):
+                        sensor_id = (index << 3) | bit
+                        self.values[sensor_id] = other.values[sensor_id]
+                self.valid[index] = mine | bits
+        for index in range(len(other.valid), len(self.valid)):
+            if self.valid[index]:
+                covered = False
+
+        if not self.text.keys() <= other.text.keys():
+            covered = False
+        self.text.update(other.text)
+        self.timestamp = max(self.timestamp, other.timestamp)
+        return covered
@@ -0,0 +1,66 @@
+import threading
+
+from src.sample import Sample
+
+
+class SampleMailbox:
+    """Single latest-sample slot between the sensor worker and the UI thread
+
+    The worker overwrites the slot instead of queueing every sample, so however
+    long the UI stalls there is at most one sample waiting and memory stays
+    bounded regardless of the sample rate. Two Sample buffers are allocated
+    once and swapped on take(); the one handed out stays untouched until the
+    next take().
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pending = None
+        self._spare = None
+        self._full = False
+
+        self.posted = 0
+        self.delivered = 0
+        self.merged = 0  # samples partially folded into a newer one before delivery
+        self.dropped = 0  # samples completely overwritten before delivery
+
+    def post(self, sample):
+        """Copy a sample into the slot, merging into a pending one; True if the reader needs waking"""
+        with self._lock:
+            self.posted += 1
+            if self._pending is None:
+                self._pending = Sample(sample.schema)
+                self._spare = Sample(sample.schema)
+
+            if not self._full:
+                self._pending.copy_from(sample)
+                self._full = True
+                return True
+
+            # Merge partial updates so readings the UI has not seen yet survive
+            if self._pending.merge_from(sample):
+                self.dropped += 1
+            else:
+                self.merged += 1
+            return False
+
+    def take(self):
+        """Return the pending sample, None if there is none; valid until the next take()"""
+        with self._lock:
+            if not self._full:
+                return None
+            sample = self._pending
+            self._pending, self._spare = self._spare, sample
+            self._full = False
+            self.delivered += 1
+            return sample
+
+    def stats(self):
+        with self._lock:
+            return {
+                "posted": self.posted,
+                "delivered": self.delivered,
+                "merged": self.merged,
+                "dropped": self.dropped,
+                "pending": self._full,
+            }
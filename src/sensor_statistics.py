@@ -0,0 +1,153 @@
+import threading
+
+from src.sample import SensorMap
+from src.utils.streaming import Ewma, WindowedExtrema, WindowedQuantileSketch
+
+
+# Smoothed averages kept for every sensor: (label, half-life in seconds)
+EWMA_HALF_LIVES = [
+    ("1 min", 60),
+    ("5 min", 5 * 60),
+    ("15 min", 15 * 60),
+]
+
+# Sliding window of the windowed minimum, maximum and quantiles
+DEFAULT_WINDOW = 3600  # s
+
+# Quantiles reported in summaries
+SUMMARY_QUANTILES = {"p50": 0.5, "p95": 0.95, "p99": 0.99}
+
+
+class SeriesStatistics:
+    """Streaming estimators of one sensor, O(1) per reading and independent of how long it has run"""
+    __slots__ = ("count", "total", "minimum", "maximum", "latest", "ewmas", "extrema", "sketch")
+
+    def __init__(self, window=DEFAULT_WINDOW, half_lives=EWMA_HALF_LIVES, relative_accuracy=0.01):
+        # Since start
+        self.count = 0
+        self.total = 0.0
+        self.minimum = None
+        self.maximum = None
+        self.latest = None
+
+        # Recent behaviour
+        self.ewmas = [Ewma(half_life) for _, half_life in half_lives]
+        self.extrema = WindowedExtrema(window)
+        self.sketch = WindowedQuantileSketch(window, relative_accuracy=relative_accuracy)
+
+    def update(self, timestamp, value):
+        self.count += 1
+        self.total += value
+        if self.minimum is None or value < self.minimum:
+            self.minimum = value
+        if self.maximum is None or value > self.maximum:
+            self.maximum = value
+        self.latest = value
+
+        for ewma in self.ewmas:
+            ewma.update(timestamp, value)
+        self.extrema.update(timestamp, value)
+        self.sketch.add(timestamp, value)
+
+
+class SensorStatistics:
+    """Thread-safe statistics stage fed with every sample, queried by sensor key
+
+    Runs next to SensorHistory in the worker, before samples are coalesced
+    for the UI, so every reading counts. Queries cost the same however long
+    the monitor has been running and never touch the history buffers.
+    """
+
+    def __init__(self, window=DEFAULT_WINDOW, half_lives=EWMA_HALF_LIVES, relative_accuracy=0.01):
+        self.window = window
+        self.half_lives = half_lives
+        self.relative_accuracy = relative_accuracy
+
+        self._series = SensorMap(lambda sensor: sensor.key)  # sensor key -> SeriesStatistics
+        self._lock = threading.Lock()
+
+        # Sample time of the latest recorded reading, so queries can tell how stale a series is
+        self.latest_time = None
+
+    def record(self, sample):
+        """Feed the valid readings of a Sample"""
+        if not sample.timestamp:
+            return
+
+        with self._lock:
+            by_id = self._series.sync(sample.schema)
+            timestamp = sample.timestamp
+            sensors = sample.schema.sensors
+            values = sample.values
+            valid = sample.valid
+            # Same walk as Sample.items(), inlined since this runs for every reading
+            for index, bits in enumerate(valid):
+                if not bits:
+                    continue
+                for bit in range(8):
+                    if bits & (1 << bit):
+                        sensor_id = (index << 3) | bit
+                        if sensor_id >= len(sensors):
+                            break
+                        series = by_id[sensor_id]
+                        if series is None:
+                            sensor = sensors[sensor_id]
+                            if sensor is None:
+                                continue
+                            series = self._series.resolve(sensor, self._new_series)
+                        series.update(timestamp, values[sensor_id])
+            self.latest_time = timestamp
+
+    def _new_series(self, sensor):
+        return SeriesStatistics(self.window, self.half_lives, self.relative_accuracy)
+
+    def keys(self):
+        with self._lock:
+            return list(self._series)
+
+    def quantile(self, key, q):
+        """Value at quantile q (0..1) over the window, None for unknown sensors"""
+        with self._lock:
+            series = self._series.get(key)
+            return series.sketch.quantile(q) if series is not None else None
+
+    def ewma(self, key, label):
+        """Smoothed average by half-life label, e.g. "5 min", None for unknown sensors"""
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                return None
+            for (name, _), ewma in zip(self.half_lives, series.ewmas):
+                if name == label:
+                    return ewma.value
+            raise KeyError(f"No moving average with half-life {label!r}")
+
+    def summary(self, key):
+        """Every statistic of one sensor as a plain dict, None for sensors that never reported"""
+        with self._lock:
+            series = self._series.get(key)
+            return self._summary(series) if series is not None else None
+
+    def summaries(self):
+        """{sensor key: summary} for every sensor, e.g. for exporters"""
+        with self._lock:
+            return {key: self._summary(series) for key, series in self._series.items()}
+
+    def _summary(self, series):
+        quantiles = series.sketch.quantiles(list(SUMMARY_QUANTILES.values()))
+        summary = {
+            "count": series.count,
+            "latest": series.latest,
+            "mean": series.total / series.count,
+            "min": series.minimum,
+            "max": series.maximum,
+            "window": self.window,
+            "window_min": series.extrema.minimum,
+            "window_max": series.extrema.maximum,
+            "ewma": {name: ewma.value for (name, _), ewma in zip(self.half_lives, series.ewmas)},
+        }
+        # Bucket midpoints may overshoot the readings they stand for; stay within what was seen
+        low, high = summary["window_min"], summary["window_max"]
+        for name, value in zip(SUMMARY_QUANTILES, quantiles):
+            summary[name] = min(max(value, low), high) if value is not None else None
+        return summary
@@ -0,0 +1,309 @@
+import json
+import os
+import struct
+import time
+from array import array
+from multiprocessing import shared_memory
+
+
+# Layout of the shared block, all little-endian and 8-byte aligned:
+#
+#   header   magic, slot_count, capacity, schema_size, text_size, write_seq, heartbeat, writer pid
+#   schema   seq, generation, length, JSON sensor registry and recent retirements
+#            (rewritten only when sensors are added or retired)
+#   text     seq, generation, length, JSON free text (rewritten only when it changes)
+#   slots    seq, schema generation, timestamp, value count, capacity float64 values, validity bitmap
+#
+# The schema, the text and every slot are guarded by a seqlock: the writer
+# makes the sequence odd, writes, then makes it even again. A reader copies the
+# data and accepts it only if it saw the same even sequence before and after.
+MAGIC = b"PCPULSE4"
+
+# Schema area reserved per sensor slot
+SCHEMA_BYTES_PER_SENSOR = 384
+# Size of the free text area
+DEFAULT_TEXT_SIZE = 16 * 1024
+
+# Text key of the warning published when not every sensor fits the ring
+OVERFLOW_TEXT_KEY = "monitor.message"
+
+# Retirement batches republished with the registry, for readers that skipped a few registries
+RETIRED_BATCHES = 16
+
+_HEADER = struct.Struct("<8sIIII")
+_WRITE_SEQ_OFFSET = 24
+_HEARTBEAT_OFFSET = 32
+_PID_OFFSET = 40
+_HEADER_SIZE = 64
+
+# Header of the schema and text areas
+_AREA_HEADER = struct.Struct("<QQI4x")
+_SLOT_HEADER = struct.Struct("<QQdI4x")
+
+_Q = struct.Struct("<Q")
+_D = struct.Struct("<d")
+
+
+def _bitmap_size(capacity):
+    return ((capacity + 7) // 8 + 7) // 8 * 8
+
+
+class SampleRing:
+    """Fixed-layout ring of Sample slots in shared memory, one writer and any number of readers
+
+    Sensor ids are local to the writing process. The writer publishes its
+    sensor registry in the schema area whenever it changes; each reader maps
+    those ids onto its own SensorSchema, so a restarted writer that registers
+    sensors in a different order is handled transparently. Sensors the writer
+    retires are listed in the schema area and retired in the reader's schema as
+    well; a sensor merely missing from the registry (not reported yet by a
+    restarted writer, or beyond the ring's capacity) is kept.
+    """
+
+    def __init__(self, shm, owner):
+        self.shm = shm
+        self.owner = owner
+        self.buf = shm.buf
+
+        magic, self.slot_count, self.capacity, self.schema_size, self.text_size = _HEADER.unpack_from(self.buf, 0)
+        if magic != MAGIC:
+            raise ValueError(f"Shared memory block {shm.name} is not a PCPulse sample ring")
+
+        self._schema_offset = _HEADER_SIZE
+        self._text_offset = self._schema_offset + _AREA_HEADER.size + self.schema_size
+        self._slots_offset = self._text_offset + _AREA_HEADER.size + self.text_size
+        self._bitmap_size = _bitmap_size(self.capacity)
+        self._slot_size = _SLOT_HEADER.size + 8 * self.capacity + self._bitmap_size
+
+        # Writer state; a restarted writer continues the generation counts so
+        # readers never pair its slots with a stale registry
+        self._schema_generation = _AREA_HEADER.unpack_from(self.buf, self._schema_offset)[1]
+        self._text_generation = _AREA_HEADER.unpack_from(self.buf, self._text_offset)[1]
+        self._published_version = -1
+        self._published_text = None
+        self._published_count = None
+        self._overflow_text = None  # warning added to the text while sensors do not fit
+        self._writer_keys = set()  # keys in the last published registry of this writer
+        self._retired = []  # [generation, keys] of the latest retirements, oldest first
+
+        # Reader state
+        self._reader_generation = 0
+        self._reader_text_generation = 0
+        self._reader_text = {}
+        self._remap = array('l')  # writer id -> our id, -1 for retired ids
+
+    @classmethod
+    def create(cls, slot_count=64, capacity=1024, schema_size=None, text_size=DEFAULT_TEXT_SIZE):
+        if schema_size is None:
+            schema_size = capacity * SCHEMA_BYTES_PER_SENSOR
+        schema_size = (schema_size + 7) // 8 * 8
+        text_size = (text_size + 7) // 8 * 8
+        size = (_HEADER_SIZE + 2 * _AREA_HEADER.size + schema_size + text_size
+                + slot_count * (_SLOT_HEADER.size + 8 * capacity + _bitmap_size(capacity)))
+        shm = shared_memory.SharedMemory(create=True, size=size)
+        _HEADER.pack_into(shm.buf, 0, MAGIC, slot_count, capacity, schema_size, text_size)
+        return cls(shm, owner=True)
+
+    @classmethod
+    def attach(cls, name):
+        return cls(shared_memory.SharedMemory(name=name), owner=False)
+
+    @property
+    def name(self):
+        return self.shm.name
+
+    def close(self):
+        self.buf = None
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+    # Writer side
+
+    def beat(self):
+        """Record that the writer is alive, read by the supervisor to detect hangs"""
+        _D.pack_into(self.buf, _HEARTBEAT_OFFSET, time.monotonic())
+        _Q.pack_into(self.buf, _PID_OFFSET, os.getpid())
+
+    def write_sample(self, sample):
+        """Publish a Sample; the registry and the text are each only rewritten when they changed"""
+        schema = sample.schema
+        if schema.version != self._published_version:
+            # Read the version first so a concurrent registration is republished next time
+            self._published_version = schema.version
+            sensors = list(schema.sensors)
+            self._schema_generation += 1
+
+            # Our schema only loses keys through retire(), so these were retired explicitly
+            keys = {sensor.key for sensor in sensors if sensor is not None}
+            retired = self._writer_keys - keys
+            self._writer_keys = keys
+            if retired:
+                self._retired.append([self._schema_generation, sorted(retired)])
+                del self._retired[:-RETIRED_BATCHES]
+
+            payload = self._schema_payload(sensors)
+            self._write_area(self._schema_offset, self.schema_size, self._schema_generation, payload)
+            # The overflow warning may have changed with the registry
+            self._published_text = None
+
+        if sample.text != self._published_text:
+            self._text_generation += 1
+            self._write_area(self._text_offset, self.text_size, self._text_generation,
+                             self._text_payload(sample.text))
+            self._published_text = dict(sample.text)
+
+        seq = self.write_seq()
+        offset = self._slot_offset(seq)
+        count = min(len(sample.values), self.capacity)
+        valid_count = (count + 7) // 8
+
+        _Q.pack_into(self.buf, offset, 2 * seq + 1)
+        start = offset + _SLOT_HEADER.size
+        self.buf[start:start + 8 * count] = memoryview(sample.values).cast('B')[:8 * count]
+        start += 8 * self.capacity
+        self.buf[start:start + valid_count] = sample.valid[:valid_count]
+        _SLOT_HEADER.pack_into(self.buf, offset, 2 * seq + 1, self._schema_generation, sample.timestamp, count)
+        _Q.pack_into(self.buf, offset, 2 * seq + 2)
+        _Q.pack_into(self.buf, _WRITE_SEQ_OFFSET, seq + 1)
+
+    def _schema_payload(self, sensors):
+        """Encoded registry and retirements, cut down to the first sensors that fit the ring"""
+        count = min(len(sensors), self.capacity)
+        retired = self._retired
+        while True:
+            registry = [sensor.to_dict() if sensor is not None else None for sensor in sensors[:count]]
+            payload = json.dumps({"sensors": registry, "retired": retired}, separators=(",", ":")).encode()
+            if len(payload) <= self.schema_size or not (count or retired):
+                break
+            if len(retired) > 1 or not count:
+                # Older retirements only matter to readers that fell behind
+                retired = retired[1:]
+            else:
+                # Drop sensors in proportion to the excess, at least one per pass
+                count = min(count - 1, count * self.schema_size // len(payload))
+
+        self._overflow_text = None
+        if count < len(sensors):
+            self._overflow_text = f"Showing {count} of {len(sensors)} sensors, the rest do not fit the shared sample ring"
+            if count != self._published_count:
+                print(self._overflow_text)
+        self._published_count = count
+        return payload
+
+    def _text_payload(self, text):
+        """Encoded free text plus any overflow warning, dropping entries that do not fit the text area"""
+        text = dict(text)
+        if self._overflow_text is not None:
+            text[OVERFLOW_TEXT_KEY] = self._overflow_text
+        while True:
+            payload = json.dumps(text, separators=(",", ":")).encode()
+            if len(payload) <= self.text_size or not text:
+                return payload
+            print(f"Text {next(iter(text))!r} does not fit the shared sample ring")
+            text.pop(next(iter(text)))
+
+    def _write_area(self, offset, size, generation, payload):
+        """Replace the contents of the schema or text area under its seqlock"""
+        if len(payload) > size:
+            # Only possible with an area too small for an empty payload; keep the last contents
+            print(f"{len(payload)} bytes do not fit the {size} byte area of the shared sample ring")
+            return
+
+        # Odd while writing; a writer killed mid-write may have left it odd already
+        seq = _Q.unpack_from(self.buf, offset)[0] + 1 | 1
+        _Q.pack_into(self.buf, offset, seq)
+        start = offset + _AREA_HEADER.size
+        self.buf[start:start + len(payload)] = payload
+        _AREA_HEADER.pack_into(self.buf, offset, seq, generation, len(payload))
+        _Q.pack_into(self.buf, offset, seq + 1)
+
+    # Reader side
+
+    def write_seq(self):
+        """Number of slots written so far"""
+        return _Q.unpack_from(self.buf, _WRITE_SEQ_OFFSET)[0]
+
+    def heartbeat(self):
+        return _D.unpack_from(self.buf, _HEARTBEAT_OFFSET)[0]
+
+    def writer_pid(self):
+        return _Q.unpack_from(self.buf, _PID_OFFSET)[0]
+
+    def read_sample(self, seq, sample):
+        """Decode slot `seq` into `sample` (remapped to its schema); False if the slot is unusable"""
+        offset = self._slot_offset(seq)
+        expected = 2 * seq + 2
+        if _Q.unpack_from(self.buf, offset)[0] != expected:
+            # Overwritten by a newer lap of the ring
+            return False
+
+        _, generation, timestamp, count = _SLOT_HEADER.unpack_from(self.buf, offset)
+        start = offset + _SLOT_HEADER.size
+        values = memoryview(bytes(self.buf[start:start + 8 * count])).cast('d')
+        start += 8 * self.capacity
+        valid = bytes(self.buf[start:start + (count + 7) // 8])
+        if _Q.unpack_from(self.buf, offset)[0] != expected:
+            return False
+
+        if not self._sync_schema(sample.schema):
+            return False
+        if generation != self._reader_generation:
+            # Written against a registry we cannot map (e.g. by a writer since replaced)
+            return False
+        self._sync_text()
+
+        sample.clear()
+        sample.timestamp = timestamp
+        remap = self._remap
+        for index, bits in enumerate(valid):
+            if bits:
+                for bit in range(8):
+                    if bits & (1 << bit):
+                        sensor_id = (index << 3) | bit
+                        if sensor_id < len(remap) and remap[sensor_id] >= 0:
+                            sample.set(remap[sensor_id], values[sensor_id])
+        sample.text.update(self._reader_text)
+        return True
+
+    def _sync_schema(self, schema):
+        """Refresh the id mapping into `schema` if the writer published a new registry"""
+        generation, payload = self._read_area(self._schema_offset, self._reader_generation)
+        if generation is None:
+            return False
+        if payload is not None:
+            registry = json.loads(payload)
+            # Retire what the writer retired since the registry we mapped last, and nothing else
+            schema.retire([key for retired_at, keys in registry["retired"] if retired_at > self._reader_generation
+                           for key in keys])
+            self._remap = array('l', [schema.register_info(info) if info is not None else -1
+                                      for info in registry["sensors"]])
+            self._reader_generation = generation
+        return True
+
+    def _sync_text(self):
+        """Refresh the free text if the writer published a new one, keeping the last one while it writes"""
+        generation, payload = self._read_area(self._text_offset, self._reader_text_generation)
+        if payload is not None:
+            self._reader_text = json.loads(payload)
+            self._reader_text_generation = generation
+
+    def _read_area(self, offset, known_generation):
+        """(generation, payload) of the schema or text area, payload None when still at `known_generation`
+
+        Returns (None, None) if the writer kept the area busy for every attempt.
+        """
+        for _ in range(100):
+            seq, generation, length = _AREA_HEADER.unpack_from(self.buf, offset)
+            if seq & 1:
+                continue
+            if generation == known_generation:
+                return generation, None
+            start = offset + _AREA_HEADER.size
+            payload = bytes(self.buf[start:start + length])
+            if _Q.unpack_from(self.buf, offset)[0] == seq:
+                return generation, payload
+        return None, None
+
+    def _slot_offset(self, seq):
+        return self._slots_offset + (seq % self.slot_count) * self._slot_size
@@ -1,14 +1,93 @@
 from PySide6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QGroupBox,
                                QLabel, QProgressBar, QScrollArea, QSizePolicy)
+import time
+
 from PySide6.QtCore import Qt, Slot
 from src.ui.sensor_widget import TemperatureSensorWidget
 
 
+# Rolling statistics change slowly, so their text is refreshed at most this often
+STATS_REFRESH_INTERVAL = 1.0  # s
+
+# Moving average shown next to live values, by half-life label
+DASHBOARD_EWMA = "5 min"
+
+
+class _SectionRows:
+    """Rows of one dashboard section, created once per key and updated in place
+
+    Each update lists its rows in display order between begin() and end();
+    rows that are not listed are hidden rather than deleted, and the layout is
+    only rearranged when the set or order of rows changes.
+    """
+
+    def __init__(self, layout):
+        self.layout = layout
+        self.widgets = {}  # key -> row widget
+        self.order = []  # keys currently in the layout
+        self.current = []
+
+    def begin(self):
+        self.current = []
+
+    def label(self, key, text, style=None, stats=""):
+        if stats:
+            text = f"{text}    {stats}"
+        widget = self.widgets.get(key)
+        if widget is None:
+            widget = self.widgets[key] = QLabel()
+            if style:
+                widget.setStyleSheet(style)
+        if widget.text() != text:
+            widget.setText(text)
+        self.current.append(key)
+
+    def temperature(self, key, name, temperature, stats=""):
+        widget = self.widgets.get(key)
+        if widget is None:
+            widget = self.widgets[key] = TemperatureSensorWidget(name, temperature)
+        else:
+            widget.set_temperature(temperature)
+        widget.set_stats(stats)
+        self.current.append(key)
+
+    def remove(self, keys):
+        """Delete the rows of sensors that will not report again"""
+        for key in keys:
+            widget = self.widgets.pop(key, None)
+            if widget is not None:
+                self.layout.removeWidget(widget)
+                widget.deleteLater()
+        self.order = [key for key in self.order if key in self.widgets]
+
+    def end(self):
+        if self.current == self.order:
+            return
+        for key in self.order:
+            self.layout.removeWidget(self.widgets[key])
+        shown = set(self.current)
+        for key, widget in self.widgets.items():
+            if key not in shown:
+                widget.hide()
+        for key in self.current:
+            self.layout.addWidget(self.widgets[key])
+            self.widgets[key].show()
+        self.order = self.current
+
+
 class DashboardWidget(QWidget):
     def __init__(self, hardware_monitor):
         super().__init__()
 
         self.hardware_monitor = hardware_monitor
+        self.statistics = hardware_monitor.statistics
+
+        # Cached statistics text per sensor key and when it was last refreshed
+        self._stats_text = {}
+        self._stats_time = 0.0
+
+        # Schema retirements already reflected in the rows
+        self._retirements = 0
 
         # Main layout
         main_layout = QVBoxLayout(self)
@@ -21,6 +100,12 @@ class DashboardWidget(QWidget):
         scroll_content = QWidget()
         scroll_layout = QVBoxLayout(scroll_content)
 
+        # Monitor-wide warnings, e.g. sensors that do not fit the collector's sample ring
+        self.monitor_message = QLabel()
+        self.monitor_message.setStyleSheet("color: #FFA500;")  # Orange text
+        self.monitor_message.setWordWrap(True)
+        self.monitor_message.hide()
+
         # CPU section
         self.cpu_group = QGroupBox("CPU")
         cpu_layout = QVBoxLayout(self.cpu_group)
@@ -28,6 +113,8 @@ class DashboardWidget(QWidget):
         self.cpu_name = QLabel("Loading CPU info...")
         self.cpu_usage = QProgressBar()
         self.cpu_usage.setRange(0, 100)
+        self.cpu_usage_stats = QLabel()
+        self.cpu_usage_stats.setStyleSheet("color: #888888;")  # Gray text
 
         # CPU temperature widgets container
         self.cpu_temp_layout = QVBoxLayout()
@@ -35,6 +122,7 @@ class DashboardWidget(QWidget):
         cpu_layout.addWidget(self.cpu_name)
         cpu_layout.addWidget(QLabel("CPU Utilization:"))
         cpu_layout.addWidget(self.cpu_usage)
+        cpu_layout.addWidget(self.cpu_usage_stats)
         cpu_layout.addWidget(QLabel("CPU Temperatures:"))
         cpu_layout.addLayout(self.cpu_temp_layout)
 
@@ -60,126 +148,177 @@ class DashboardWidget(QWidget):
         mb_layout.addWidget(QLabel("Motherboard Sensors:"))
         mb_layout.addLayout(self.mb_temp_layout)
 
+        # Container section, only shown when cgroup monitoring is enabled
+        self.cgroup_group = QGroupBox("Container (cgroup v2)")
+        cgroup_layout = QVBoxLayout(self.cgroup_group)
+
+        self.cgroup_sensor_layout = QVBoxLayout()
+        cgroup_layout.addLayout(self.cgroup_sensor_layout)
+        self.cgroup_group.hide()
+
         # Add all groups to scroll layout
+        scroll_layout.addWidget(self.monitor_message)
         scroll_layout.addWidget(self.cpu_group)
         scroll_layout.addWidget(self.gpu_group)
         scroll_layout.addWidget(self.mb_group)
+        scroll_layout.addWidget(self.cgroup_group)
         scroll_layout.addStretch()
 
         # Set the scroll content and add to main layout
         scroll_area.setWidget(scroll_content)
         main_layout.addWidget(scroll_area)
 
+        # Section rows, reused across updates
+        self.cpu_rows = _SectionRows(self.cpu_temp_layout)
+        self.gpu_rows = _SectionRows(self.gpu_temp_layout)
+        self.mb_rows = _SectionRows(self.mb_temp_layout)
+        self.cgroup_rows = _SectionRows(self.cgroup_sensor_layout)
+
         # Connect signals
         self.hardware_monitor.data_updated.connect(self.update_dashboard)
 
-    @Slot(dict)
-    def update_dashboard(self, data):
-        # Handle partial updates - check which sections are included in the data
-        if 'cpu' in data:
-            cpu_data = data['cpu']
-
-            # Only update what's available in this update
-            if 'name' in cpu_data:
-                self.cpu_name.setText(
-                    f"{cpu_data['name']} ({cpu_data.get('core_count', '?')} cores, {cpu_data.get('thread_count', '?')} threads)")
-
-            if 'overall_usage' in cpu_data:
-                self.cpu_usage.setValue(int(cpu_data['overall_usage']))
-
-            if 'temperature' in cpu_data:
-                # Clear and update CPU temperature widgets
-                self._clear_layout(self.cpu_temp_layout)
-
-                for sensor_name, temp in cpu_data['temperature'].items():
-                    if temp is not None:
-                        sensor_widget = TemperatureSensorWidget(sensor_name, temp)
-                        self.cpu_temp_layout.addWidget(sensor_widget)
-
-        if 'gpu' in data:
-            gpu_data = data['gpu']
-            if gpu_data['available']:
-                if 'devices' in gpu_data and gpu_data['devices']:
-                    self.gpu_name.setText(gpu_data['devices'][0]['name'])
-                else:
-                    self.gpu_name.setText("GPU detected")
-
-                # Clear and update GPU temperature widgets
-                self._clear_layout(self.gpu_temp_layout)
-
-                # Add message about Intel GPU if applicable
-                if 'message' in gpu_data:
-                    message_label = QLabel(gpu_data['message'])
-                    message_label.setStyleSheet("color: #FFA500;")  # Orange text
-                    self.gpu_temp_layout.addWidget(message_label)
-
-                # Show GPU utilization info if temperature is unavailable
-                if 'utilization' in gpu_data:
-                    for metric_name, value in gpu_data['utilization'].items():
-                        label = QLabel(f"{metric_name.replace('_', ' ').title()}: {value}")
-                        self.gpu_temp_layout.addWidget(label)
-
-                if 'temperature' in gpu_data:
-                    for sensor_name, temp in gpu_data['temperature'].items():
-                        if temp is not None:
-                            sensor_widget = TemperatureSensorWidget(sensor_name, temp)
-                            self.gpu_temp_layout.addWidget(sensor_widget)
-                        else:
-                            label = QLabel(f"{sensor_name}: Not available")
-                            label.setStyleSheet("color: #888888;")  # Gray text
-                            self.gpu_temp_layout.addWidget(label)
-            else:
-                self.gpu_name.setText("No dedicated GPU detected")
-
-        if 'motherboard' in data:
-            mb_data = data['motherboard']
-            if 'manufacturer' in mb_data and 'model' in mb_data:
-                model_name = mb_data.get('model_name', mb_data['model'])
-                self.mb_name.setText(f"{mb_data['manufacturer']} {model_name}")
-            else:
-                self.mb_name.setText("Motherboard information unavailable")
-
-            # Clear and update motherboard temperature widgets
-            self._clear_layout(self.mb_temp_layout)
-
-            # Show message if present
-            if 'message' in mb_data:
-                message_label = QLabel(mb_data['message'])
-                message_label.setStyleSheet("color: #FFA500;")  # Orange text
-                self.mb_temp_layout.addWidget(message_label)
-
-            # Show battery info if present
-            if 'battery' in mb_data:
-                for metric, value in mb_data['battery'].items():
-                    label = QLabel(f"Battery {metric.replace('_', ' ').title()}: {value}")
-                    self.mb_temp_layout.addWidget(label)
-
-            # Show sensors if available
-            if 'sensors' in mb_data:
-                if mb_data['sensors']:
-                    for sensor_name, sensor_data in mb_data['sensors'].items():
-                        if isinstance(sensor_data, dict) and 'value' in sensor_data:
-                            temp = sensor_data['value']
-                        else:
-                            temp = sensor_data
-
-                        if temp is not None:
-                            sensor_widget = TemperatureSensorWidget(sensor_name, temp)
-                            self.mb_temp_layout.addWidget(sensor_widget)
+    @Slot(object)
+    def update_dashboard(self, sample):
+        # Values arrive as raw numbers in a Sample; all formatting happens here
+        schema = sample.schema
+
+        now = time.monotonic()
+        if now - self._stats_time >= STATS_REFRESH_INTERVAL:
+            self._stats_time = now
+            self._stats_text.clear()
+
+        message = sample.text.get('monitor.message', "")
+        if self.monitor_message.text() != message:
+            self.monitor_message.setText(message)
+            self.monitor_message.setVisible(bool(message))
+
+        # CPU section - only update what's available in this update
+        if 'cpu.name' in sample.text:
+            cores = sample.value('cpu.cores')
+            threads = sample.value('cpu.threads')
+            self.cpu_name.setText(
+                f"{sample.text['cpu.name']} ({'?' if cores is None else int(cores)} cores, "
+                f"{'?' if threads is None else int(threads)} threads)")
+
+        usage = sample.value('cpu.usage')
+        if usage is not None:
+            self.cpu_usage.setValue(int(usage))
+            stats = self._stats(schema.get('cpu.usage'))
+            if self.cpu_usage_stats.text() != stats:
+                self.cpu_usage_stats.setText(stats)
+
+        # Update CPU temperature widgets
+        rows = self.cpu_rows
+        rows.begin()
+        for sensor in schema.section('cpu', 'temperature'):
+            temp = sample.get(sensor.id)
+            if temp is not None:
+                rows.temperature(sensor.key, sensor.label, temp, self._stats(sensor))
+        rows.end()
+
+        # GPU section
+        gpu_names = [name for key, name in sample.text.items() if key.startswith("gpu.") and key.endswith(".name")]
+
+        if gpu_names:
+            self.gpu_name.setText(", ".join(gpu_names))
+
+            # Update GPU temperature widgets
+            rows = self.gpu_rows
+            rows.begin()
+
+            # Add message about Intel GPU if applicable
+            if 'gpu.message' in sample.text:
+                rows.label('gpu.message', sample.text['gpu.message'], "color: #FFA500;")  # Orange text
+            if 'gpu.note' in sample.text:
+                rows.label('gpu.note', sample.text['gpu.note'])
+
+            # Show GPU utilization, memory, power and clocks
+            for sensor in schema.section('gpu'):
+                value = sample.get(sensor.id)
+                if sensor.kind != 'temperature' and value is not None:
+                    rows.label(sensor.key, f"{sensor.label}: {sensor.format(value)}", stats=self._stats(sensor))
+
+            for sensor in schema.section('gpu', 'temperature'):
+                temp = sample.get(sensor.id)
+                if temp is not None:
+                    rows.temperature(sensor.key, sensor.label, temp, self._stats(sensor))
                 else:
-                    no_sensors_label = QLabel("No temperature sensors detected")
-                    self.mb_temp_layout.addWidget(no_sensors_label)
-
-            # Show power info if present
-            if 'power' in mb_data:
-                for metric, value in mb_data['power'].items():
-                    label = QLabel(f"{metric}: {value}")
-                    self.mb_temp_layout.addWidget(label)
-
-    def _clear_layout(self, layout):
-        """Clear all widgets from a layout"""
-        while layout.count():
-            item = layout.takeAt(0)
-            widget = item.widget()
-            if widget:
-                widget.deleteLater()
+                    rows.label(f"{sensor.key}.unavailable", f"{sensor.label}: Not available",
+                               "color: #888888;")  # Gray text
+            rows.end()
+        else:
+            self.gpu_name.setText("No dedicated GPU detected")
+
+        # Motherboard section
+        if 'motherboard.manufacturer' in sample.text and 'motherboard.model' in sample.text:
+            model_name = sample.text.get('motherboard.model_name', sample.text['motherboard.model'])
+            self.mb_name.setText(f"{sample.text['motherboard.manufacturer']} {model_name}")
+        else:
+            self.mb_name.setText("Motherboard information unavailable")
+
+        # Update motherboard temperature widgets
+        rows = self.mb_rows
+        rows.begin()
+
+        # Show message if present
+        if 'motherboard.message' in sample.text:
+            rows.label('motherboard.message', sample.text['motherboard.message'], "color: #FFA500;")  # Orange text
+
+        # Show battery info if present
+        for sensor in schema.section('motherboard', 'charge'):
+            value = sample.get(sensor.id)
+            if value is not None:
+                rows.label(sensor.key, f"{sensor.label}: {sensor.format(value)}", stats=self._stats(sensor))
+        for metric in ('status', 'remaining'):
+            key = f"motherboard.battery.{metric}"
+            if key in sample.text:
+                rows.label(key, f"Battery {metric.title()}: {sample.text[key]}")
+
+        # Show sensors if available
+        mb_sensors = schema.section('motherboard', 'temperature')
+        for sensor in mb_sensors:
+            temp = sample.get(sensor.id)
+            if temp is not None:
+                rows.temperature(sensor.key, sensor.label, temp, self._stats(sensor))
+        if not mb_sensors:
+            rows.label('motherboard.no_sensors', "No temperature sensors detected")
+
+        # Show power info if present
+        for sensor in schema.section('motherboard', 'power'):
+            value = sample.get(sensor.id)
+            if value is not None:
+                rows.label(sensor.key, f"{sensor.label}: {sensor.format(value)}", stats=self._stats(sensor))
+        rows.end()
+
+        # Container section; rows of cgroups that went away are deleted, not just hidden
+        if schema.retirements != self._retirements:
+            self._retirements = schema.retirements
+            self.cgroup_rows.remove([key for key in self.cgroup_rows.widgets if schema.id(key) is None])
+        cgroup_sensors = schema.section('cgroup')
+        if cgroup_sensors:
+            self.cgroup_group.show()
+            rows = self.cgroup_rows
+            rows.begin()
+            # Keep each cgroup's rows together, metrics in registration order
+            for sensor in sorted(cgroup_sensors, key=lambda sensor: sensor.key.rsplit('.', 1)[0]):
+                value = sample.get(sensor.id)
+                if value is not None:
+                    rows.label(sensor.key, f"{sensor.label}: {sensor.format(value)}", stats=self._stats(sensor))
+            rows.end()
+
+    def _stats(self, sensor):
+        """Rolling statistics of a sensor as display text, cached between refreshes"""
+        text = self._stats_text.get(sensor.key)
+        if text is None:
+            summary = self.statistics.summary(sensor.key)
+            text = ""
+            # A single reading has nothing to summarise yet
+            if summary is not None and summary["count"] > 1:
+                window = summary["window"]
+                window = f"{window / 3600:g} h" if window >= 3600 else f"{window / 60:g} min"
+                average = summary["ewma"][DASHBOARD_EWMA]
+                text = (f"{DASHBOARD_EWMA} avg {sensor.format(average)} · "
+                        f"{window} p95 {sensor.format(summary['p95'])}, max {sensor.format(summary['window_max'])} · "
+                        f"avg since start {sensor.format(summary['mean'])}")
+            self._stats_text[sensor.key] = text
+        return text
@@ -0,0 +1,172 @@
+import time
+
+from PySide6.QtWidgets import QWidget, QVBoxLayout, QHBoxLayout, QLabel, QComboBox, QSizePolicy
+from PySide6.QtCore import Qt, Slot, QPointF, QRectF
+from PySide6.QtGui import QPainter, QPen, QColor, QPolygonF
+
+
+# Visible time ranges offered in the History tab
+HISTORY_SPANS = [
+    ("5 minutes", 5 * 60),
+    ("1 hour", 3600),
+    ("6 hours", 6 * 3600),
+    ("24 hours", 24 * 3600),
+    ("7 days", 7 * 24 * 3600),
+]
+
+
+def _format_span(seconds):
+    if seconds >= 86400:
+        return f"-{seconds / 86400:g} d"
+    if seconds >= 3600:
+        return f"-{seconds / 3600:g} h"
+    if seconds >= 60:
+        return f"-{seconds / 60:g} min"
+    return f"-{seconds:g} s"
+
+
+class HistoryChart(QWidget):
+    """Line chart of one history series, decimated to the widget's pixel width"""
+
+    MARGIN_LEFT = 60
+    MARGIN_RIGHT = 10
+    MARGIN_TOP = 10
+    MARGIN_BOTTOM = 24
+
+    def __init__(self, history):
+        super().__init__()
+
+        self.history = history
+        self.series_name = None
+        self.span = HISTORY_SPANS[0][1]
+
+        self.setMinimumHeight(200)
+        self.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Expanding)
+
+    def set_series(self, name):
+        self.series_name = name
+        self.update()
+
+    def set_span(self, seconds):
+        self.span = seconds
+        self.update()
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        painter.fillRect(self.rect(), QColor(25, 25, 25))
+
+        plot = QRectF(self.MARGIN_LEFT, self.MARGIN_TOP,
+                      self.width() - self.MARGIN_LEFT - self.MARGIN_RIGHT,
+                      self.height() - self.MARGIN_TOP - self.MARGIN_BOTTOM)
+        if plot.width() <= 0 or plot.height() <= 0:
+            return
+
+        end = self.history.latest_time() or time.time()
+        start = end - self.span
+        points = []
+        if self.series_name is not None:
+            points = self.history.decimate(self.series_name, start, end, int(plot.width()))
+
+        painter.setPen(QColor(210, 210, 210))
+        if not points:
+            painter.drawText(plot, Qt.AlignCenter, "No data yet")
+            return
+
+        unit = self.history.unit(self.series_name)
+        low = min(value for _, value in points)
+        high = max(value for _, value in points)
+        if unit == "%":
+            low, high = 0.0, 100.0
+        elif high - low < 1e-9:
+            low, high = low - 1, high + 1
+        else:
+            padding = (high - low) * 0.05
+            low, high = low - padding, high + padding
+
+        # Grid and value labels
+        grid_pen = QPen(QColor(68, 68, 68))
+        for i in range(5):
+            y = plot.top() + plot.height() * i / 4
+            value = high - (high - low) * i / 4
+            painter.setPen(grid_pen)
+            painter.drawLine(QPointF(plot.left(), y), QPointF(plot.right(), y))
+            painter.setPen(QColor(210, 210, 210))
+            painter.drawText(QRectF(0, y - 8, self.MARGIN_LEFT - 6, 16),
+                             Qt.AlignRight | Qt.AlignVCenter, f"{value:.1f} {unit}")
+
+        # Time labels
+        painter.drawText(QRectF(plot.left(), plot.bottom() + 4, plot.width(), 16),
+                         Qt.AlignLeft, _format_span(self.span))
+        painter.drawText(QRectF(plot.left(), plot.bottom() + 4, plot.width(), 16),
+                         Qt.AlignRight, "now")
+
+        # Series line
+        x_scale = plot.width() / self.span
+        y_scale = plot.height() / (high - low)
+        polygon = QPolygonF([QPointF(plot.left() + (t - start) * x_scale,
+                                     plot.bottom() - (value - low) * y_scale)
+                             for t, value in points])
+
+        painter.setRenderHint(QPainter.Antialiasing)
+        painter.setClipRect(plot)
+        # Antialiased strokes wider than a pixel cost over 100x more on noisy series, paint after paint
+        painter.setPen(QPen(QColor(42, 130, 218), 1))
+        painter.drawPolyline(polygon)
+
+
+class HistoryWidget(QWidget):
+    def __init__(self, hardware_monitor):
+        super().__init__()
+
+        self.hardware_monitor = hardware_monitor
+        self.history = hardware_monitor.history
+        self._series_names = []
+
+        # Main layout
+        main_layout = QVBoxLayout(self)
+
+        # Series and range selectors
+        controls_layout = QHBoxLayout()
+
+        self.series_combo = QComboBox()
+        self.series_combo.setMinimumWidth(200)
+        self.span_combo = QComboBox()
+        for label, seconds in HISTORY_SPANS:
+            self.span_combo.addItem(label, seconds)
+
+        controls_layout.addWidget(QLabel("Sensor:"))
+        controls_layout.addWidget(self.series_combo)
+        controls_layout.addWidget(QLabel("Range:"))
+        controls_layout.addWidget(self.span_combo)
+        controls_layout.addStretch()
+
+        # Chart
+        self.chart = HistoryChart(self.history)
+
+        main_layout.addLayout(controls_layout)
+        main_layout.addWidget(self.chart)
+
+        # Connect signals
+        self.series_combo.currentTextChanged.connect(self.chart.set_series)
+        self.span_combo.currentIndexChanged.connect(
+            lambda index: self.chart.set_span(self.span_combo.itemData(index)))
+        self.hardware_monitor.data_updated.connect(self.update_history)
+
+    @Slot(object)
+    def update_history(self, sample):
+        # Pick up series that appeared or went away since the last update
+        names = self.history.series_names()
+        if names != self._series_names:
+            current = set(names)
+            for i in reversed(range(self.series_combo.count())):
+                if self.series_combo.itemText(i) not in current:
+                    self.series_combo.removeItem(i)
+            known = {self.series_combo.itemText(i) for i in range(self.series_combo.count())}
+            for name in names:
+                if name not in known:
+                    self.series_combo.addItem(name)
+            self._series_names = names
+
+        # Only repaint while the tab is actually shown
+        if self.isVisible():
+            self.chart.update()
@@ -3,11 +3,12 @@ from PySide6.QtCore import Qt
 from PySide6.QtGui import QIcon, QAction
 
 from src.ui.dashboard import DashboardWidget
+from src.ui.history import HistoryWidget
 from src.hardware_monitor import HardwareMonitor
 from src.ui.themes import apply_dark_theme
 
 class MainWindow(QMainWindow):
-    def __init__(self):
+    def __init__(self, isolated_collector=False, collector_options=None):
         super().__init__()
 
         self.setWindowTitle("PCPulse Hardware Monitor")
@@ -17,7 +18,8 @@ class MainWindow(QMainWindow):
         apply_dark_theme(self)
 
         # Create hardware monitor
-        self.hardware_monitor = HardwareMonitor(update_interval=1000)
+        self.hardware_monitor = HardwareMonitor(update_interval=1000, isolated=isolated_collector,
+                                                collector_options=collector_options)
 
         # Create central widget with tabs
         self.tabs = QTabWidget()
@@ -27,6 +29,10 @@ class MainWindow(QMainWindow):
         self.dashboard = DashboardWidget(self.hardware_monitor)
         self.tabs.addTab(self.dashboard, "Dashboard")
 
+        # Create history charts
+        self.history = HistoryWidget(self.hardware_monitor)
+        self.tabs.addTab(self.history, "History")
+
         # Create menu
         self.create_menu()
 
@@ -20,22 +20,41 @@ class TemperatureSensorWidget(QWidget):
         self.name_label.setMinimumWidth(120)
 
         # Temperature value
-        self.temp_label = QLabel(f"{temperature:.1f}°C")
+        self.temp_label = QLabel()
         self.temp_label.setMinimumWidth(70)
 
         # Progress bar for visual representation
         self.temp_bar = QProgressBar()
         self.temp_bar.setRange(0, 100)
-        self.temp_bar.setValue(min(int(temperature), 100))
         self.temp_bar.setTextVisible(False)
 
-        # Set temperature status color
-        self.update_status_color(temperature)
+        # Rolling statistics next to the live value
+        self.stats_label = QLabel()
+        self.stats_label.setStyleSheet("color: #888888;")  # Gray text
+
+        # Status band the colors were last set for
+        self.status = None
+        self.set_temperature(temperature)
 
         # Add widgets to layout
         layout.addWidget(self.name_label)
         layout.addWidget(self.temp_label)
         layout.addWidget(self.temp_bar)
+        layout.addWidget(self.stats_label)
+
+    def set_temperature(self, temperature):
+        """Show a new reading, restyling only when it crosses a threshold"""
+        self.temp_label.setText(f"{temperature:.1f}°C")
+        self.temp_bar.setValue(min(int(temperature), 100))
+
+        status = (temperature >= self.GOOD_THRESHOLD) + (temperature >= self.WARNING_THRESHOLD)
+        if status != self.status:
+            self.status = status
+            self.update_status_color(temperature)
+
+    def set_stats(self, text):
+        if self.stats_label.text() != text:
+            self.stats_label.setText(text)
 
     def update_status_color(self, temperature):
         """Update the color of the progress bar based on temperature"""
@@ -3,5 +3,8 @@ PCPulse utility functions package
 """
 
 from src.utils.system_info import get_system_info
+from src.utils.downsample import bucket_width_for, minmax_buckets
+from src.utils.streaming import Ewma, WindowedExtrema, QuantileSketch, WindowedQuantileSketch
 
-__all__ = ['get_system_info']
+__all__ = ['get_system_info', 'bucket_width_for', 'minmax_buckets',
+           'Ewma', 'WindowedExtrema', 'QuantileSketch', 'WindowedQuantileSketch']
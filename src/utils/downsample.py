@@ -0,0 +1,47 @@
+import math
+
+
+def bucket_width_for(span, pixels, min_width=0.25):
+    """Pick a power-of-two bucket width (seconds) giving about one bucket per pixel
+
+    Rounding to powers of two means small resizes and scrolls map onto the same
+    zoom level, so decimated buckets can be cached and reused.
+    """
+    raw = max(span / max(pixels, 1), min_width)
+    return min_width * 2 ** math.ceil(math.log2(raw / min_width))
+
+
+def minmax_buckets(times, values, start, stop, width):
+    """Min/max decimation of samples[start:stop] into time-aligned buckets
+
+    Yields (bucket_index, points) for every non-empty bucket, where points holds
+    the minimum and maximum sample of the bucket in time order (or a single
+    point when they coincide). Keeping both extremes means spikes survive
+    decimation, which matters for temperature and load peaks.
+    """
+    current = None
+    for i in range(start, stop):
+        t = times[i]
+        v = values[i]
+        bucket = int(t // width)
+        if bucket != current:
+            if current is not None:
+                yield current, _bucket_points(lo_t, lo_v, hi_t, hi_v)
+            current = bucket
+            lo_t = hi_t = t
+            lo_v = hi_v = v
+        elif v < lo_v:
+            lo_t, lo_v = t, v
+        elif v > hi_v:
+            hi_t, hi_v = t, v
+
+    if current is not None:
+        yield current, _bucket_points(lo_t, lo_v, hi_t, hi_v)
+
+
+def _bucket_points(lo_t, lo_v, hi_t, hi_v):
+    if lo_t == hi_t:
+        return ((lo_t, lo_v),)
+    if lo_t < hi_t:
+        return ((lo_t, lo_v), (hi_t, hi_v))
+    return ((hi_t, hi_v), (lo_t, lo_v))
@@ -0,0 +1,170 @@
+import math
+from collections import deque
+
+
+class Ewma:
+    """Exponentially weighted moving average with a half-life in seconds
+
+    The decay is computed from the time between readings, so irregular
+    sampling (refreshes, overruns) weights readings correctly.
+    """
+    __slots__ = ("half_life", "value", "time", "_rate")
+
+    def __init__(self, half_life):
+        self.half_life = half_life
+        self._rate = math.log(2) / half_life
+        self.value = None
+        self.time = None
+
+    def update(self, timestamp, value):
+        if self.value is None:
+            self.value = value
+        else:
+            elapsed = max(timestamp - self.time, 0.0)
+            alpha = 1.0 - math.exp(-elapsed * self._rate)
+            self.value += alpha * (value - self.value)
+        self.time = timestamp
+
+
+class WindowedExtrema:
+    """Minimum and maximum over a sliding time window, kept in two monotonic deques
+
+    Each reading enters and leaves each deque at most once, so updates are
+    amortised O(1); only readings that can still become the extreme are kept.
+    """
+    __slots__ = ("window", "_min", "_max")
+
+    def __init__(self, window):
+        self.window = window
+        self._min = deque()  # (time, value), values increasing
+        self._max = deque()  # (time, value), values decreasing
+
+    def update(self, timestamp, value):
+        low, high = self._min, self._max
+        while low and low[-1][1] >= value:
+            low.pop()
+        low.append((timestamp, value))
+        while high and high[-1][1] <= value:
+            high.pop()
+        high.append((timestamp, value))
+
+        cutoff = timestamp - self.window
+        while low[0][0] <= cutoff:
+            low.popleft()
+        while high[0][0] <= cutoff:
+            high.popleft()
+
+    @property
+    def minimum(self):
+        return self._min[0][1] if self._min else None
+
+    @property
+    def maximum(self):
+        return self._max[0][1] if self._max else None
+
+
+class QuantileSketch:
+    """Mergeable quantile sketch with bounded relative error (DDSketch-style log buckets)
+
+    Readings are counted in logarithmically sized buckets, so any quantile is
+    within `relative_accuracy` of a real reading. Memory depends only on the
+    range of the values, not on how many were added: about 230 buckets cover
+    1 to 100 at 1%, and a sensor that moves within a few degrees uses a dozen.
+    """
+
+    # Keeps positive bucket keys above zero and negative ones below it, so keys sort like values
+    _BIAS = 1 << 20
+    # Magnitudes below this count as zero
+    _MIN_VALUE = 1e-9
+
+    def __init__(self, relative_accuracy=0.01):
+        self.relative_accuracy = relative_accuracy
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self.gamma)
+        self.buckets = {}  # bucket key -> count
+        self.count = 0
+
+    def key(self, value):
+        if abs(value) < self._MIN_VALUE:
+            return 0
+        key = math.ceil(math.log(abs(value)) / self._log_gamma) + self._BIAS
+        return key if value > 0 else -key
+
+    def value(self, key):
+        """Representative value of a bucket, within the relative accuracy of everything in it"""
+        if key == 0:
+            return 0.0
+        value = 2 * self.gamma ** (abs(key) - self._BIAS) / (self.gamma + 1)
+        return value if key > 0 else -value
+
+    def add(self, value, count=1):
+        self.add_key(self.key(value), count)
+
+    def add_key(self, key, count=1):
+        self.buckets[key] = self.buckets.get(key, 0) + count
+        self.count += count
+
+    def add_buckets(self, buckets, sign=1):
+        """Add (or with sign=-1 remove) the counts of another sketch's buckets"""
+        for key, count in buckets.items():
+            remaining = self.buckets.get(key, 0) + sign * count
+            if remaining:
+                self.buckets[key] = remaining
+            else:
+                self.buckets.pop(key, None)
+            self.count += sign * count
+
+    def quantiles(self, qs):
+        """Values at the given quantiles (0..1) in one pass, None if the sketch is empty"""
+        if not self.count:
+            return [None] * len(qs)
+        ranks = sorted((q * (self.count - 1), index) for index, q in enumerate(qs))
+        results = [None] * len(qs)
+        position = 0
+        seen = 0
+        for key in sorted(self.buckets):
+            seen += self.buckets[key]
+            while position < len(ranks) and ranks[position][0] < seen:
+                results[ranks[position][1]] = self.value(key)
+                position += 1
+            if position == len(ranks):
+                break
+        return results
+
+    def quantile(self, q):
+        return self.quantiles([q])[0]
+
+
+class WindowedQuantileSketch:
+    """Quantile sketch over a sliding time window
+
+    The window is split into `slices` sub-sketches. A running total sketch is
+    kept alongside them: readings are added to both, and when a slice ages out
+    its counts are subtracted from the total. Updates stay O(1) and queries
+    only walk the total's buckets. The window edge is accurate to one slice.
+    """
+
+    def __init__(self, window, slices=12, relative_accuracy=0.01):
+        self.slice_width = window / slices
+        self.slices = slices
+        self.total = QuantileSketch(relative_accuracy)
+        self._ring = deque()  # (slice index, {bucket key: count}), oldest first
+
+    def add(self, timestamp, value):
+        index = int(timestamp // self.slice_width)
+        ring = self._ring
+        if not ring or ring[-1][0] < index:
+            ring.append((index, {}))
+            while ring[0][0] <= index - self.slices:
+                self.total.add_buckets(ring.popleft()[1], -1)
+
+        key = self.total.key(value)
+        buckets = ring[-1][1]
+        buckets[key] = buckets.get(key, 0) + 1
+        self.total.add_key(key)
+
+    def quantiles(self, qs):
+        return self.total.quantiles(qs)
+
+    def quantile(self, q):
+        return self.total.quantile(q)
@@ -0,0 +1,155 @@
+import shutil
+
+import pytest
+
+from src.cgroup_monitor import CgroupMonitor
+from src.collectors import CGROUP_METRICS, CHILD_CHARTED_METRICS, SensorCollector
+from src.history import SensorHistory
+from src.sample import Sample, SensorSchema
+from src.sensor_statistics import SensorStatistics
+from src.shm_ring import SampleRing
+
+MIB = 1024 * 1024
+
+
+def make_cgroup(path, usage_usec=0, memory_current=256 * MIB, memory_max="1073741824", cpu_max="200000 100000"):
+    """Write the accounting files of one fake cgroup v2 directory"""
+    path.mkdir(parents=True, exist_ok=True)
+    (path / "cpu.stat").write_text(f"usage_usec {usage_usec}\nnr_periods 10\nnr_throttled 2\nthrottled_usec 500\n")
+    (path / "cpu.max").write_text(f"{cpu_max}\n")
+    (path / "memory.current").write_text(f"{memory_current}\n")
+    (path / "memory.max").write_text(f"{memory_max}\n")
+    (path / "memory.pressure").write_text("some avg10=0.00 avg60=0.00 avg300=0.00 total=100\n"
+                                          "full avg10=0.00 avg60=0.00 avg300=0.00 total=50\n")
+    (path / "io.stat").write_text("8:0 rbytes=4096 wbytes=8192 rios=1 wios=2 dbytes=0 dios=0\n")
+    return path
+
+
+@pytest.fixture
+def cgroup_root(tmp_path):
+    root = tmp_path / "cgroup"
+    root.mkdir()
+    (root / "cgroup.controllers").write_text("cpu io memory pids\n")
+    make_cgroup(root / "app.slice")
+    return root
+
+
+@pytest.fixture
+def rescan_every_read(monkeypatch):
+    monkeypatch.setattr("src.cgroup_monitor.RESCAN_INTERVAL", 0.0)
+
+
+def test_reads_limits_and_deltas(cgroup_root):
+    monitor = CgroupMonitor(root=str(cgroup_root), cgroup="/app.slice")
+    assert monitor.available()
+    monitor.start()
+    try:
+        first = monitor.read()[""]
+        assert first["cpu_limit"] == 2.0
+        assert first["memory_current"] == 256 * MIB
+        assert first["memory_percent"] == 25.0
+        assert "cpu_percent" not in first
+
+        make_cgroup(cgroup_root / "app.slice", usage_usec=10_000_000, memory_max="max")
+        second = monitor.read()[""]
+        assert second["cpu_percent"] > 0
+        assert second["memory_max"] is None
+        assert "memory_percent" not in second
+    finally:
+        monitor.stop()
+
+
+def test_missing_hierarchy_is_unavailable(tmp_path):
+    assert not CgroupMonitor(root=str(tmp_path), cgroup="/app.slice").available()
+
+
+def test_children_are_bounded_by_count_and_depth(cgroup_root, rescan_every_read):
+    base = cgroup_root / "app.slice"
+    for name in ("a", "b", "c", "d"):
+        make_cgroup(base / name)
+    make_cgroup(base / "a" / "nested")
+    make_cgroup(base / "a" / "nested" / "too-deep")
+
+    monitor = CgroupMonitor(root=str(cgroup_root), cgroup="/app.slice", include_children=True,
+                            max_children=4, max_depth=2)
+    monitor.start()
+    try:
+        # Shallowest first, and nothing below max_depth
+        assert sorted(monitor.read()) == ["", "a", "b", "c", "d"]
+        assert monitor.skipped == 1
+
+        # A removed child frees its place for one that was skipped
+        shutil.rmtree(base / "b")
+        assert sorted(monitor.read()) == ["", "a", "a/nested", "c", "d"]
+        assert monitor.skipped == 0
+    finally:
+        monitor.stop()
+
+
+def test_removed_cgroups_retire_their_sensors(cgroup_root, rescan_every_read):
+    base = cgroup_root / "app.slice"
+    make_cgroup(base / "web")
+
+    collector = SensorCollector(cgroup={}, chart_cgroup_children=True)
+    schema = collector.schema
+    collector.cgroup_monitor = CgroupMonitor(root=str(cgroup_root), cgroup="/app.slice", include_children=True)
+    collector.cgroup_monitor.start()
+    history = SensorHistory()
+    statistics = SensorStatistics()
+    ring = SampleRing.create(slot_count=4, capacity=128)
+    reader = Sample(SensorSchema())
+    try:
+        def tick(timestamp):
+            sample = collector.sample
+            sample.clear()
+            sample.timestamp = timestamp
+            collector.read_cgroups(sample)
+            history.record(sample)
+            statistics.record(sample)
+            ring.write_sample(sample)
+            assert ring.read_sample(ring.write_seq() - 1, reader)
+
+        tick(1000.0)
+        make_cgroup(base / "web", usage_usec=1_000_000)
+        tick(1001.0)
+        web_ids = {schema.id(key) for key in collector._cgroup_keys["web"]}
+        size = len(schema)
+        assert "cgroup.web.cpu_percent" in statistics.keys()
+        assert "web CPU Usage" in history.series_names()
+        assert reader.value("cgroup.web.memory_current") == 256.0
+
+        shutil.rmtree(base / "web")
+        make_cgroup(base / "db", memory_current=512 * MIB)
+        tick(1002.0)
+
+        # Everything kept for the removed cgroup is gone, and its ids are reused
+        assert schema.id("cgroup.web.memory_current") is None
+        assert not any(key.startswith("cgroup.web.") for key in statistics.keys())
+        assert not any(name.startswith("web ") for name in history.series_names())
+        assert reader.schema.id("cgroup.web.memory_current") is None
+        assert reader.value("cgroup.db.memory_current") == 512.0
+        assert {schema.id(key) for key in collector._cgroup_keys["db"]} <= web_ids
+        assert len(schema) == size
+    finally:
+        collector.cgroup_monitor.stop()
+        ring.close()
+
+
+@pytest.mark.parametrize("chart_children", [False, True])
+def test_child_cgroups_are_charted_only_on_request(cgroup_root, rescan_every_read, chart_children):
+    make_cgroup(cgroup_root / "app.slice" / "web")
+    collector = SensorCollector(cgroup={}, chart_cgroup_children=chart_children)
+    collector.cgroup_monitor = CgroupMonitor(root=str(cgroup_root), cgroup="/app.slice", include_children=True)
+    collector.cgroup_monitor.start()
+    try:
+        # Rates are only reported from the second reading on
+        collector.read_cgroups(collector.sample)
+        collector.read_cgroups(collector.sample)
+    finally:
+        collector.cgroup_monitor.stop()
+
+    charted = {sensor.key for sensor in collector.schema.section("cgroup") if sensor.chart}
+    own = {f"cgroup...{metric}" for metric, info in CGROUP_METRICS.items() if info[4]}
+    children = {f"cgroup.web.{metric}" for metric in CHILD_CHARTED_METRICS} if chart_children else set()
+    assert collector.schema.get("cgroup.web.memory_max") is not None
+    assert charted == own | children
@@ -0,0 +1,187 @@
+import subprocess
+import sys
+import threading
+import time
+
+from src.collectors import SensorCollector
+from src.gpu_monitor import GPUMonitor, NvidiaSmiStream, read_amdgpu_sysfs
+from src.sample import Sample
+
+
+LINE = "0, NVIDIA Test GPU, 42, 17, 1024, 8192, 65, 120.50, 1800"
+
+
+def fake_nvidia_smi(tmp_path, body):
+    """Write an executable stand-in for nvidia-smi running the given Python body"""
+    script = tmp_path / "nvidia-smi"
+    script.write_text(f"#!{sys.executable}\nimport sys, time\n{body}\n")
+    script.chmod(0o755)
+    return str(script)
+
+
+def wait_for(condition, timeout=10.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.02)
+    return False
+
+
+def test_parse_line():
+    stream = NvidiaSmiStream("unused")
+    device = stream.parse_line(LINE)
+    assert device["name"] == "NVIDIA Test GPU"
+    assert device["load"] == 42 and device["temperature"] == 65 and device["power"] == 120.5
+    assert stream.parse_line("index, name, utilization.gpu") is None
+    assert stream.parse_line("0, GPU, [N/A], [N/A], 1, 2, N/A, N/A, N/A")["temperature"] is None
+
+
+def test_stream_reads_fake_child(tmp_path):
+    executable = fake_nvidia_smi(tmp_path, f"""
+while True:
+    print({LINE!r}, flush=True)
+    time.sleep(0.05)
+""")
+    stream = NvidiaSmiStream(executable, interval_ms=50)
+    stream.start()
+    try:
+        assert wait_for(lambda: stream.devices())
+        assert stream.devices()[0]["clock"] == 1800
+        assert stream.restarts == 0
+    finally:
+        stream.stop()
+    assert not stream.is_running()
+
+
+def test_stream_restarts_exited_child(tmp_path):
+    executable = fake_nvidia_smi(tmp_path, f"print({LINE!r}, flush=True)\nsys.exit(3)")
+    stream = NvidiaSmiStream(executable, interval_ms=50, restart_delay=0.05, max_restart_delay=0.1)
+    stream.start()
+    try:
+        assert wait_for(lambda: stream.restarts >= 2)
+        assert "code 3" in stream.last_error
+    finally:
+        stream.stop()
+
+
+def test_watchdog_kills_silent_child(tmp_path):
+    # Prints once, then wedges like a hung driver call
+    executable = fake_nvidia_smi(tmp_path, f"print({LINE!r}, flush=True)\ntime.sleep(60)")
+    stream = NvidiaSmiStream(executable, interval_ms=50, restart_delay=0.05, max_restart_delay=0.1,
+                             stale_after=0.3)
+    stream.start()
+    try:
+        assert wait_for(lambda: stream.hangs >= 1 and stream.restarts >= 1)
+        assert "printed nothing" in stream.last_error
+        # The restarted child reports again
+        assert wait_for(lambda: stream.devices())
+    finally:
+        stream.stop()
+
+
+def test_stop_while_starting_a_child_kills_it(tmp_path, monkeypatch):
+    executable = fake_nvidia_smi(tmp_path, "time.sleep(60)")
+    stream = NvidiaSmiStream(executable, interval_ms=50)
+    started = []
+    popen = subprocess.Popen
+
+    def stop_then_popen(*args, **kwargs):
+        # stop() arrives after the reader decided to start a child, before the child exists
+        stopper = threading.Thread(target=stream.stop)
+        stopper.start()
+        stream._stop.wait(1)
+        started.append(popen(*args, **kwargs))
+        started.append(stopper)
+        return started[0]
+
+    monkeypatch.setattr("src.gpu_monitor.subprocess.Popen", stop_then_popen)
+    stream.start()
+    try:
+        assert wait_for(lambda: len(started) == 2)
+        started[1].join(5)
+        assert wait_for(lambda: started[0].poll() is not None, timeout=3)
+    finally:
+        if started and started[0].poll() is None:
+            started[0].kill()
+        stream.stop()
+
+
+def make_amdgpu(drm_root, card, name="Radeon Test"):
+    device = drm_root / card / "device"
+    hwmon = device / "hwmon" / "hwmon3"
+    hwmon.mkdir(parents=True)
+    (device / "gpu_busy_percent").write_text("37\n")
+    (device / "mem_busy_percent").write_text("12\n")
+    (device / "mem_info_vram_used").write_text(str(512 * 1024 * 1024))
+    (device / "mem_info_vram_total").write_text(str(4096 * 1024 * 1024))
+    (device / "product_name").write_text(name)
+    (hwmon / "temp1_input").write_text("54000")
+    (hwmon / "power1_average").write_text("35000000")
+    (hwmon / "freq1_input").write_text("1500000000")
+
+
+def test_read_amdgpu_sysfs(tmp_path):
+    make_amdgpu(tmp_path, "card1")
+    # Connectors and non-amdgpu cards are skipped
+    (tmp_path / "card1-DP-1").mkdir()
+    (tmp_path / "card0" / "device").mkdir(parents=True)
+
+    devices = read_amdgpu_sysfs(str(tmp_path))
+    assert len(devices) == 1
+    device = devices[0]
+    assert device["vendor"] == "AMD" and device["name"] == "Radeon Test"
+    assert device["index"] == 1
+    assert device["load"] == 37 and device["memory_used"] == 512 and device["memory_total"] == 4096
+    assert device["temperature"] == 54 and device["power"] == 35 and device["clock"] == 1500
+
+
+def test_gpu_monitor_combines_sources(tmp_path):
+    executable = fake_nvidia_smi(tmp_path, f"""
+while True:
+    print({LINE!r}, flush=True)
+    time.sleep(0.05)
+""")
+    drm_root = tmp_path / "drm"
+    make_amdgpu(drm_root, "card1")
+
+    monitor = GPUMonitor(interval_ms=50, nvidia_smi=executable, drm_root=str(drm_root))
+    monitor.start()
+    try:
+        assert wait_for(lambda: len(monitor.devices()) == 2)
+        assert [device["vendor"] for device in monitor.devices()] == ["NVIDIA", "AMD"]
+    finally:
+        monitor.stop()
+
+
+class FakeGPUMonitor:
+    def __init__(self):
+        self.current = []
+
+    def devices(self):
+        return self.current
+
+
+def test_gpu_sensors_keep_their_keys_whatever_else_is_listed():
+    collector = SensorCollector()
+    collector.gpu_monitor = FakeGPUMonitor()
+    nvidia = NvidiaSmiStream("unused").parse_line(LINE)
+    amd = {"vendor": "AMD", "index": 1, "name": "Radeon Test", "load": 37.0, "memory_load": None,
+           "memory_used": 512.0, "memory_total": 4096.0, "temperature": 54.0, "power": None, "clock": None}
+
+    def read(devices):
+        collector.gpu_monitor.current = devices
+        sample = Sample(collector.schema)
+        collector.read_gpu(sample)
+        return sample
+
+    # nvidia-smi has not printed yet, so the AMD card is the only one listed
+    sample = read([amd])
+    assert sample.value("gpu.amd.1.load") == 37.0
+    assert collector.schema.get("gpu.amd.1.load").label == "AMD GPU 1 Load"
+
+    sample = read([nvidia, amd])
+    assert sample.value("gpu.nvidia.0.load") == 42.0
+    assert sample.value("gpu.amd.1.load") == 37.0
+    assert collector.schema.get("gpu.nvidia.0.temperature").title == "NVIDIA GPU 0 Temperature"
+    assert sample.text["gpu.amd.1.name"] == "Radeon Test"
@@ -0,0 +1,101 @@
+import time
+
+import pytest
+
+from src.hardware_monitor import SensorWorker
+from src.sample import Sample
+
+
+class SlowCollector:
+    """Stand-in for SensorCollector whose collect_data takes `delay` seconds"""
+
+    def __init__(self, interval_ms, schema, delay=0.0):
+        self.schema = schema
+        self.sample = Sample(schema)
+        self.delay = delay
+        self.started = []  # monotonic start time of every collect_data call
+        self.stopped = False
+
+    def start(self):
+        pass
+
+    def stop(self):
+        self.stopped = True
+
+    def collect_data(self):
+        self.started.append(time.monotonic())
+        time.sleep(self.delay)
+        self.sample.timestamp = time.time()
+        return self.sample
+
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.005)
+    return False
+
+
+@pytest.fixture
+def start_worker():
+    workers = []
+
+    def start(interval_ms, delay=0.0):
+        worker = SensorWorker(collector_factory=SlowCollector, collector_options={"delay": delay})
+        worker.interval = interval_ms
+        worker.start()
+        workers.append(worker)
+        assert wait_for(lambda: worker.samples >= 1)
+        return worker
+
+    yield start
+    for worker in workers:
+        worker.stop()
+
+
+def test_ticks_keep_to_absolute_deadlines(start_worker):
+    worker = start_worker(100, delay=0.03)
+    assert wait_for(lambda: worker.samples >= 6)
+
+    # Collection time must not add up: the sixth tick starts 500 ms after the first, not 650
+    started = worker.collector.started
+    for index in range(6):
+        assert started[index] - started[0] == pytest.approx(index * 0.1, abs=0.04)
+    assert worker.overruns == 0
+
+
+def test_ticks_missed_by_slow_collection_are_skipped_and_counted(start_worker):
+    worker = start_worker(50, delay=0.12)
+    assert wait_for(lambda: worker.samples >= 4)
+    worker.stop()
+
+    # Every collection overruns two ticks; the next one starts on the following deadline
+    assert worker.overruns >= 2 * (worker.samples - 1)
+    started = worker.collector.started
+    for index in range(1, 4):
+        offset = started[index] - started[0]
+        assert offset == pytest.approx(index * 0.15, abs=0.04)
+
+
+def test_refresh_request_cuts_the_wait_short(start_worker):
+    worker = start_worker(10_000)
+    requested = time.monotonic()
+    worker.request_refresh()
+
+    assert wait_for(lambda: worker.samples == 2, timeout=1.0)
+    assert worker.collector.started[1] - requested < 0.1
+    assert worker.refreshes == 1
+    assert worker.overruns == 0
+
+
+def test_stop_returns_at_once(start_worker):
+    worker = start_worker(100, delay=0.03)
+    assert wait_for(lambda: worker.samples >= 3)
+
+    started = time.monotonic()
+    worker.stop()
+    # At most one collection in flight has to finish
+    assert time.monotonic() - started < 0.1
+    assert worker.collector.stopped
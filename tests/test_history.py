@@ -0,0 +1,68 @@
+import bisect
+import random
+
+from src.history import HistorySeries
+from src.utils.downsample import bucket_width_for, minmax_buckets
+
+
+def expected_points(series, start, end, pixels):
+    """Decimation computed from scratch over the visible range"""
+    times, values = series.times, series.values
+    lo = bisect.bisect_left(times, start)
+    hi = bisect.bisect_right(times, end)
+    if hi - lo <= 2 * pixels:
+        return list(zip(times[lo:hi], values[lo:hi]))
+
+    width = bucket_width_for(end - start, pixels)
+    first = bisect.bisect_left(times, int(times[lo] // width) * width)
+    points = []
+    for _, bucket_points in minmax_buckets(times, values, first, hi, width):
+        points.extend(bucket_points)
+    return points
+
+
+def filled_series(count, max_samples=None):
+    series = HistorySeries("test", max_samples=max_samples or count)
+    for i in range(count):
+        series.append(float(i), float((i * 7919) % 1000))
+    return series
+
+
+def test_first_paint_caches_only_the_visible_range():
+    series = filled_series(200_000)
+    points = series.decimate(200_000 - 3600, 200_000, 500)
+
+    assert points == expected_points(series, 200_000 - 3600, 200_000, 500)
+    for level in series._levels.values():
+        assert len(level) <= 500
+        assert level.start >= 200_000 - 3600 - 2 * 16
+
+
+def test_cache_follows_new_samples_and_changing_views():
+    series = filled_series(50_000, max_samples=60_000)
+    rng = random.Random(1)
+    now = 50_000
+    for _ in range(300):
+        for _ in range(rng.choice([1, 1, 50, 2000])):
+            now += 1
+            series.append(float(now), rng.random())
+        span = rng.choice([60, 600, 3600, 3 * 3600, 100_000])
+        end = now - rng.choice([0, 0, 0, 500, 20_000])
+        assert series.decimate(end - span, end, 400) == expected_points(series, end - span, end, 400)
+
+    assert series.dropped > 0
+    for level in series._levels.values():
+        assert len(level) <= 2 * 400 + 1
+
+
+def test_trim_keeps_the_oldest_samples_drawn():
+    series = filled_series(10_000)
+    series.decimate(-2000, 10_000, 300)
+
+    # The trim cuts the first cached bucket in half; its remaining samples must still be drawn
+    for i in range(10_000, 11_500):
+        series.append(float(i), float((i * 7919) % 1000))
+    end = series.times[-1]
+    points = series.decimate(end - 12_000, end, 300)
+
+    assert points == expected_points(series, end - 12_000, end, 300)
@@ -0,0 +1,117 @@
+from src.sample import Sample, SensorSchema
+from src.sample_mailbox import SampleMailbox
+
+
+def register(schema, count):
+    return [schema.register(f"fake.{index}", f"Fake {index}", "cpu", "load", "%") for index in range(count)]
+
+
+def make_sample(schema, readings, timestamp=1000.0, text=None):
+    sample = Sample(schema)
+    sample.timestamp = timestamp
+    for sensor_id, value in readings.items():
+        sample.set(sensor_id, value)
+    sample.text.update(text or {})
+    return sample
+
+
+def readings(sample):
+    return {sensor.id: value for sensor, value in sample.items()}
+
+
+def test_post_wakes_the_reader_only_when_the_slot_fills():
+    schema = SensorSchema()
+    ids = register(schema, 2)
+    mailbox = SampleMailbox()
+
+    assert mailbox.take() is None
+    assert mailbox.post(make_sample(schema, {ids[0]: 1.0}))
+    assert not mailbox.post(make_sample(schema, {ids[0]: 2.0}))
+    assert not mailbox.post(make_sample(schema, {ids[0]: 3.0}))
+
+    assert readings(mailbox.take()) == {ids[0]: 3.0}
+    assert mailbox.take() is None
+    assert mailbox.post(make_sample(schema, {ids[0]: 4.0}))
+    assert mailbox.stats() == {"posted": 4, "delivered": 1, "merged": 0, "dropped": 2, "pending": True}
+
+
+def test_partial_updates_merge_instead_of_dropping():
+    schema = SensorSchema()
+    ids = register(schema, 3)
+    mailbox = SampleMailbox()
+
+    mailbox.post(make_sample(schema, {ids[0]: 1.0, ids[1]: 10.0}, 1000.0, {"cpu.name": "Old"}))
+    # Only ids[0] is refreshed: the unseen ids[1] reading survives, so this is a merge
+    mailbox.post(make_sample(schema, {ids[0]: 2.0, ids[2]: 20.0}, 1001.0))
+    # Everything pending is covered by the newer sample, including its text: a drop
+    mailbox.post(make_sample(schema, {ids[0]: 3.0, ids[1]: 11.0, ids[2]: 21.0}, 1002.0, {"cpu.name": "New"}))
+
+    sample = mailbox.take()
+    assert readings(sample) == {ids[0]: 3.0, ids[1]: 11.0, ids[2]: 21.0}
+    assert sample.text == {"cpu.name": "New"}
+    assert sample.timestamp == 1002.0
+    assert (mailbox.merged, mailbox.dropped) == (1, 1)
+
+
+def test_two_buffers_alternate_and_the_taken_one_is_left_alone():
+    schema = SensorSchema()
+    ids = register(schema, 1)
+    mailbox = SampleMailbox()
+    posted = make_sample(schema, {ids[0]: 1.0})
+
+    mailbox.post(posted)
+    first = mailbox.take()
+    assert first is not posted
+
+    posted.set(ids[0], 2.0)
+    mailbox.post(posted)
+    assert first.get(ids[0]) == 1.0
+    second = mailbox.take()
+    assert second is not first
+
+    mailbox.post(posted)
+    assert mailbox.take() is first
+
+
+def test_buffers_follow_a_schema_that_grew_after_allocation():
+    schema = SensorSchema()
+    ids = register(schema, 2)
+    mailbox = SampleMailbox()
+    mailbox.post(make_sample(schema, {ids[0]: 1.0}))
+    mailbox.take()
+
+    # The pending buffer was sized for 2 sensors; both copy and merge have to grow it
+    ids = register(schema, 20)
+    assert mailbox.post(make_sample(schema, {ids[0]: 1.0, ids[19]: 19.0}))
+    assert not mailbox.post(make_sample(schema, {ids[11]: 11.0}))
+    assert readings(mailbox.take()) == {ids[0]: 1.0, ids[11]: 11.0, ids[19]: 19.0}
+
+
+def test_copy_from_a_larger_sample_replaces_every_reading():
+    schema = SensorSchema()
+    ids = register(schema, 3)
+    target = make_sample(schema, {ids[1]: 5.0}, 1000.0, {"cpu.name": "Old"})
+
+    ids = register(schema, 12)
+    source = make_sample(schema, {ids[0]: 1.0, ids[10]: 10.0}, 1001.0, {"cpu.name": "New"})
+    target.copy_from(source)
+
+    assert readings(target) == {ids[0]: 1.0, ids[10]: 10.0}
+    assert target.text == {"cpu.name": "New"}
+    assert target.timestamp == 1001.0
+
+
+def test_merge_from_reports_whether_anything_of_ours_survived():
+    schema = SensorSchema()
+    ids = register(schema, 1)
+    # An older sample, allocated before the schema grew
+    older = make_sample(schema, {ids[0]: 0.5}, 1000.0)
+
+    ids = register(schema, 10)
+    pending = make_sample(schema, {ids[9]: 9.0}, 1001.0)
+    assert not pending.merge_from(older)
+    assert readings(pending) == {ids[0]: 0.5, ids[9]: 9.0}
+    assert pending.timestamp == 1001.0
+
+    assert pending.merge_from(make_sample(schema, {ids[0]: 1.0, ids[9]: 9.5}, 1002.0))
+    assert readings(pending) == {ids[0]: 1.0, ids[9]: 9.5}
@@ -0,0 +1,100 @@
+import random
+
+import pytest
+
+from src.sample import Sample, SensorSchema
+from src.sensor_statistics import SensorStatistics
+
+
+def record(statistics, schema, timestamp, readings):
+    sample = Sample(schema)
+    sample.timestamp = timestamp
+    for key, value in readings.items():
+        sample.set(schema.register(key, key, "cpu", "load", "%"), value)
+    statistics.record(sample)
+
+
+def test_summary_matches_the_readings():
+    schema = SensorSchema()
+    statistics = SensorStatistics(window=100, half_lives=[("fast", 10), ("slow", 1000)])
+    rng = random.Random(5)
+    readings = []
+    for step in range(100):
+        value = rng.uniform(20, 80)
+        readings.append(value)
+        # Missing readings do not count
+        record(statistics, schema, 1000.0 + step, {"cpu.usage": value} if step % 10 else {"cpu.other": 1.0})
+    readings = [value for step, value in enumerate(readings) if step % 10]
+
+    summary = statistics.summary("cpu.usage")
+    assert summary["count"] == len(readings)
+    assert summary["mean"] == pytest.approx(sum(readings) / len(readings))
+    assert (summary["min"], summary["max"], summary["latest"]) == (min(readings), max(readings), readings[-1])
+    assert (summary["window_min"], summary["window_max"]) == (min(readings), max(readings))
+    assert summary["window"] == 100
+
+    ordered = sorted(readings)
+    for name, q in {"p50": 0.5, "p95": 0.95, "p99": 0.99}.items():
+        exact = ordered[int(q * (len(ordered) - 1))]
+        assert abs(summary[name] - exact) <= 0.01 * exact
+        assert statistics.quantile("cpu.usage", q) == pytest.approx(exact, rel=0.01)
+    assert summary["ewma"]["fast"] == statistics.ewma("cpu.usage", "fast")
+    assert min(readings) <= summary["ewma"]["slow"] <= max(readings)
+
+
+def test_quantiles_stay_within_the_readings():
+    schema = SensorSchema()
+    statistics = SensorStatistics()
+    for step in range(10):
+        record(statistics, schema, 1000.0 + step, {"cpu.usage": 42.0})
+
+    # The bucket of 42.0 stands for a slightly different value; the summary reports 42.0 itself
+    assert statistics.quantile("cpu.usage", 0.5) != 42.0
+    summary = statistics.summary("cpu.usage")
+    assert summary["p50"] == summary["p99"] == 42.0
+
+
+def test_window_statistics_forget_old_readings():
+    schema = SensorSchema()
+    statistics = SensorStatistics(window=60)
+    for step in range(60):
+        record(statistics, schema, 1000.0 + step, {"cpu.usage": 90.0})
+    for step in range(60, 180):
+        record(statistics, schema, 1000.0 + step, {"cpu.usage": 10.0})
+
+    summary = statistics.summary("cpu.usage")
+    assert (summary["min"], summary["max"]) == (10.0, 90.0)
+    assert (summary["window_min"], summary["window_max"]) == (10.0, 10.0)
+    assert summary["p99"] == 10.0
+
+
+def test_unknown_sensors_and_averages():
+    schema = SensorSchema()
+    statistics = SensorStatistics()
+    record(statistics, schema, 1000.0, {"cpu.usage": 1.0})
+
+    assert statistics.summary("cpu.missing") is None
+    assert statistics.quantile("cpu.missing", 0.5) is None
+    assert statistics.ewma("cpu.missing", "1 min") is None
+    with pytest.raises(KeyError):
+        statistics.ewma("cpu.usage", "2 min")
+    assert list(statistics.summaries()) == ["cpu.usage"]
+
+
+def test_retired_sensors_are_pruned_and_reused_ids_start_fresh():
+    schema = SensorSchema()
+    statistics = SensorStatistics()
+    record(statistics, schema, 1000.0, {"cgroup.web.cpu_percent": 50.0, "cpu.usage": 5.0})
+    record(statistics, schema, 1001.0, {"cgroup.web.cpu_percent": 60.0, "cpu.usage": 6.0})
+    web_id = schema.id("cgroup.web.cpu_percent")
+
+    schema.retire(["cgroup.web.cpu_percent"])
+    record(statistics, schema, 1002.0, {"cgroup.db.cpu_percent": 7.0, "cpu.usage": 7.0})
+
+    # The new sensor took the retired id and has only its own readings
+    assert schema.id("cgroup.db.cpu_percent") == web_id
+    assert statistics.summary("cgroup.web.cpu_percent") is None
+    assert statistics.summary("cgroup.db.cpu_percent")["count"] == 1
+    assert statistics.summary("cgroup.db.cpu_percent")["max"] == 7.0
+    assert statistics.summary("cpu.usage")["count"] == 3
+    assert sorted(statistics.keys()) == ["cgroup.db.cpu_percent", "cpu.usage"]
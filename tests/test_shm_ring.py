@@ -0,0 +1,236 @@
+import os
+import time
+
+import pytest
+
+from src.collector_process import CollectorSupervisor
+from src.history import SensorHistory
+from src.sample import Sample, SensorSchema
+from src.shm_ring import OVERFLOW_TEXT_KEY, SampleRing
+
+
+class FakeCollector:
+    """Stand-in for SensorCollector, run in the collector child through `collector_factory`
+
+    With a `marker` path, the first child to start creates the file and then
+    misbehaves after a few samples (`fail="crash"` or `fail="hang"`); children
+    started later find the file and keep working.
+    """
+
+    def __init__(self, interval_ms, sensors=2, marker=None, fail=None):
+        self.schema = SensorSchema()
+        self.sample = Sample(self.schema)
+        self.sensors = sensors
+        self.fail = None
+        if marker is not None and not os.path.exists(marker):
+            open(marker, "w").close()
+            self.fail = fail
+        self.ticks = 0
+
+    def start(self):
+        pass
+
+    def stop(self):
+        pass
+
+    def collect_data(self):
+        self.ticks += 1
+        if self.fail and self.ticks > 3:
+            if self.fail == "crash":
+                os._exit(3)
+            time.sleep(3600)
+
+        sample = self.sample
+        sample.clear()
+        sample.timestamp = time.time()
+        for index in range(self.sensors):
+            sensor_id = self.schema.register(f"fake.{index}", f"Fake {index}", "cpu", "load", "%", 0, 100)
+            sample.set(sensor_id, float(self.ticks + index))
+        sample.text["cpu.name"] = f"Fake CPU {os.getpid()}"
+        return sample
+
+
+def make_sample(schema, count, tick=0):
+    sample = Sample(schema)
+    sample.timestamp = 1000.0 + tick
+    for index in range(count):
+        sample.set(schema.register(f"fake.{index}", f"Fake {index}", "cpu", "load", "%", 0, 100), index + tick)
+    return sample
+
+
+@pytest.fixture
+def ring():
+    ring = SampleRing.create(slot_count=8, capacity=16)
+    yield ring
+    ring.close()
+
+
+def test_round_trip_remaps_into_reader_schema(ring):
+    reader_schema = SensorSchema()
+    reader_schema.register("other", "Other", "cpu", "load")
+    reader = SampleRing.attach(ring.name)
+
+    writer_schema = SensorSchema()
+    for tick in range(3):
+        sample = make_sample(writer_schema, 4, tick)
+        sample.text["cpu.name"] = "Test CPU"
+        ring.write_sample(sample)
+
+    received = Sample(reader_schema)
+    assert ring.write_seq() == 3
+    assert reader.read_sample(2, received)
+    assert received.timestamp == 1002.0
+    assert received.value("fake.0") == 2.0
+    assert received.value("fake.3") == 5.0
+    assert received.value("other") is None
+    assert received.text == {"cpu.name": "Test CPU"}
+    reader.close()
+
+
+def test_text_changes_leave_the_registry_alone(ring):
+    schema = SensorSchema()
+    sample = make_sample(schema, 4)
+    sample.text["motherboard.battery.remaining"] = "2:31 remaining"
+    ring.write_sample(sample)
+
+    received = Sample(SensorSchema())
+    assert ring.read_sample(0, received)
+    registry = ring._reader_generation
+
+    sample.text["motherboard.battery.remaining"] = "2:30 remaining"
+    ring.write_sample(sample)
+    assert ring.read_sample(1, received)
+    assert received.text["motherboard.battery.remaining"] == "2:30 remaining"
+    assert ring._schema_generation == ring._reader_generation == registry
+
+    # New sensors still republish the registry
+    ring.write_sample(make_sample(schema, 5))
+    assert ring.read_sample(2, received)
+    assert ring._reader_generation == registry + 1
+    assert received.value("fake.4") == 4.0
+
+
+def test_restarted_writer_retires_only_what_it_retired(ring):
+    received = Sample(SensorSchema())
+    history = SensorHistory()
+
+    def write(writer, schema, sensors, tick):
+        sample = Sample(schema)
+        sample.timestamp = 1000.0 + tick
+        for key, label, kind in sensors:
+            sample.set(schema.register(key, label, "cpu", kind, chart=True), 50.0)
+        writer.write_sample(sample)
+        assert ring.read_sample(ring.write_seq() - 1, received)
+        history.record(received)
+
+    cpu = ("cpu.usage", "CPU Load", "load")
+    gpu = ("gpu.nvidia.0.temperature", "NVIDIA GPU 0", "temperature")
+    schema = SensorSchema()
+    for tick in range(100):
+        write(ring, schema, [cpu, gpu], tick)
+
+    # The restarted child has not seen its GPU yet: its first registry lacks it
+    restarted = SampleRing.attach(ring.name)
+    schema = SensorSchema()
+    write(restarted, schema, [cpu], 100)
+    assert history.series_names() == ["CPU Load", "NVIDIA GPU 0 Temperature"]
+    assert received.schema.id(gpu[0]) is not None
+
+    write(restarted, schema, [cpu, gpu], 101)
+    schema.retire([gpu[0]])
+    write(restarted, schema, [cpu], 102)
+    assert history.series_names() == ["CPU Load"]
+    assert received.schema.id(gpu[0]) is None
+    restarted.close()
+
+
+def test_lapped_slots_are_rejected(ring):
+    schema = SensorSchema()
+    for tick in range(10):
+        ring.write_sample(make_sample(schema, 2, tick))
+
+    received = Sample(SensorSchema())
+    assert not ring.read_sample(0, received)
+    assert ring.read_sample(9, received)
+
+
+def test_sensors_beyond_capacity_degrade_with_a_warning(ring):
+    schema = SensorSchema()
+    ring.write_sample(make_sample(schema, 40))
+
+    received = Sample(SensorSchema())
+    assert ring.read_sample(0, received)
+    assert len(received.schema) == 16
+    assert received.value("fake.15") == 15.0
+    assert received.text[OVERFLOW_TEXT_KEY].startswith("Showing 16 of 40 sensors")
+
+
+def test_registry_larger_than_schema_area_degrades():
+    ring = SampleRing.create(slot_count=4, capacity=64, schema_size=4096)
+    try:
+        schema = SensorSchema()
+        sample = Sample(schema)
+        for index in range(64):
+            sample.set(schema.register(f"cgroup.{'x' * 100}{index}.cpu_percent", "CPU", "cgroup", "load"), index)
+        ring.write_sample(sample)
+
+        received = Sample(SensorSchema())
+        assert ring.read_sample(0, received)
+        assert 0 < len(received.schema) < 64
+        assert OVERFLOW_TEXT_KEY in received.text
+
+        # Listing a retirement pushes more sensors out of the registry; the reader keeps them
+        shown = [sensor.key for sensor in received.schema.sensors]
+        schema.retire([schema.sensors[63].key])
+        ring.write_sample(sample)
+        assert ring.read_sample(1, received)
+        assert [sensor.key for sensor in received.schema.sensors] == shown
+        assert ring._published_count < len(shown)
+    finally:
+        ring.close()
+
+
+def wait_for(condition, timeout=30.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.05)
+    return False
+
+
+def supervised(tmp_path, **options):
+    return CollectorSupervisor(interval_ms=50, slot_count=16, capacity=16, hang_timeout=2.0, check_interval=0.1,
+                               collector_factory=FakeCollector,
+                               collector_options=dict(options, marker=str(tmp_path / "started")))
+
+
+def test_supervisor_publishes_child_samples(tmp_path):
+    supervisor = supervised(tmp_path)
+    supervisor.start()
+    try:
+        assert wait_for(lambda: supervisor.ring.write_seq() >= 3)
+        received = Sample(SensorSchema())
+        assert supervisor.ring.read_sample(supervisor.ring.write_seq() - 1, received)
+        assert received.value("fake.1") is not None
+        assert supervisor.restarts == 0
+    finally:
+        supervisor.stop()
+
+
+@pytest.mark.parametrize("fail, error", [("crash", "exited with code 3"), ("hang", "stopped responding")])
+def test_supervisor_restarts_failed_child(tmp_path, fail, error):
+    supervisor = supervised(tmp_path, fail=fail)
+    supervisor.start()
+    try:
+        assert wait_for(lambda: supervisor.restarts >= 1)
+        assert error in supervisor.last_error
+
+        # The replacement child carries on writing into the same ring
+        written = supervisor.ring.write_seq()
+        assert wait_for(lambda: supervisor.ring.write_seq() >= written + 3)
+        received = Sample(SensorSchema())
+        assert supervisor.ring.read_sample(supervisor.ring.write_seq() - 1, received)
+        assert received.value("fake.0") is not None
+    finally:
+        supervisor.stop()
@@ -0,0 +1,136 @@
+import math
+import random
+
+import pytest
+
+from src.utils.streaming import Ewma, QuantileSketch, WindowedExtrema, WindowedQuantileSketch
+
+
+def exact_quantile(readings, q):
+    """Reading at the rank the sketch reports for quantile q"""
+    readings = sorted(readings)
+    return readings[int(q * (len(readings) - 1))]
+
+
+def assert_close(estimate, exact, relative_accuracy):
+    assert abs(estimate - exact) <= relative_accuracy * abs(exact) + 1e-12
+
+
+def test_ewma_decays_by_elapsed_time_not_by_reading_count():
+    # A step from 0 to 10 closes half the gap per half-life, however irregular the readings are
+    ewma = Ewma(60)
+    ewma.update(1000.0, 0.0)
+    assert ewma.value == 0.0
+
+    timestamp = 1000.0
+    rng = random.Random(1)
+    for _ in range(200):
+        timestamp += rng.choice([0.1, 1.0, 2.5, 7.0])
+        ewma.update(timestamp, 10.0)
+        assert ewma.value == pytest.approx(10.0 * (1 - 0.5 ** ((timestamp - 1000.0) / 60)))
+
+
+def test_ewma_ignores_time_going_backwards():
+    ewma = Ewma(10)
+    ewma.update(100.0, 4.0)
+    ewma.update(100.0, 8.0)
+    ewma.update(90.0, 8.0)
+    assert ewma.value == 4.0
+
+    ewma.update(100.0, 8.0)
+    assert ewma.value == pytest.approx(4.0 + 4.0 * (1 - 0.5 ** (10 / 10)))
+
+
+def test_windowed_extrema_follow_the_window():
+    extrema = WindowedExtrema(30)
+    rng = random.Random(2)
+    readings = []
+    timestamp = 0.0
+    for _ in range(2000):
+        timestamp += rng.choice([0.5, 1.0, 3.0, 12.0])
+        value = rng.uniform(-50, 50)
+        readings.append((timestamp, value))
+        extrema.update(timestamp, value)
+
+        window = [value for time, value in readings if time > timestamp - 30]
+        assert extrema.minimum == min(window)
+        assert extrema.maximum == max(window)
+        # Only readings that can still become an extreme are kept
+        assert len(extrema._min) <= len(window) and len(extrema._max) <= len(window)
+
+
+def test_windowed_extrema_of_nothing_are_none():
+    extrema = WindowedExtrema(30)
+    assert (extrema.minimum, extrema.maximum) == (None, None)
+
+
+def test_sketch_buckets_hold_values_within_the_relative_accuracy():
+    sketch = QuantileSketch(0.01)
+    previous = None
+    for value in [-1e6, -250.0, -1.0, -0.02, 0.0, 1e-12, 0.02, 1.0, 37.5, 250.0, 1e6]:
+        key = sketch.key(value)
+        if abs(value) < 1e-9:
+            assert key == 0 and sketch.value(key) == 0.0
+        else:
+            assert key == -sketch.key(-value)
+            assert_close(sketch.value(key), value, 0.01)
+        # Keys sort like the values they hold
+        assert previous is None or key >= previous
+        previous = key
+
+
+def test_sketch_quantiles_match_the_readings():
+    rng = random.Random(3)
+    readings = ([rng.uniform(-100, 100) for _ in range(3000)] + [0.0] * 300
+                + [rng.lognormvariate(0, 3) for _ in range(3000)])
+    sketch = QuantileSketch(0.01)
+    for value in readings:
+        sketch.add(value)
+
+    qs = [0.0, 0.01, 0.1, 0.25, 0.5, 0.75, 0.9, 0.99, 1.0]
+    assert sketch.count == len(readings)
+    for q, estimate in zip(qs, sketch.quantiles(qs)):
+        assert_close(estimate, exact_quantile(readings, q), 0.01)
+        assert estimate == sketch.quantile(q)
+
+
+def test_sketch_of_nothing_has_no_quantiles():
+    assert QuantileSketch().quantiles([0.5, 0.9]) == [None, None]
+
+
+def test_removing_buckets_undoes_adding_them():
+    sketch = QuantileSketch()
+    other = QuantileSketch()
+    for value in [1.0, 2.0, 2.0, -3.0, 0.0]:
+        sketch.add(value)
+    for value in [2.0, 5.0, 0.0]:
+        other.add(value)
+
+    sketch.add_buckets(other.buckets)
+    assert sketch.count == 8
+    sketch.add_buckets(other.buckets, -1)
+    assert sketch.count == 5
+    assert sketch.buckets == {sketch.key(1.0): 1, sketch.key(2.0): 2, sketch.key(-3.0): 1, 0: 1}
+
+
+def test_windowed_sketch_drops_slices_that_aged_out():
+    window, slices = 60, 12
+    width = window / slices
+    sketch = WindowedQuantileSketch(window, slices, 0.01)
+    rng = random.Random(4)
+    readings = []
+    timestamp = 0.0
+    for step in range(3000):
+        timestamp += rng.choice([0.25, 1.0, 4.0, 20.0])
+        # The level moves over time, so stale readings would show in the quantiles
+        value = rng.uniform(0, 10) + step
+        readings.append((timestamp, value))
+        sketch.add(timestamp, value)
+
+        # Readings of the current slice and the slices - 1 before it are in the window
+        first_slice = math.floor(timestamp / width) - slices + 1
+        live = [value for time, value in readings if math.floor(time / width) >= first_slice]
+        assert sketch.total.count == len(live)
+        assert set(sketch.total.buckets) == {sketch.total.key(value) for value in live}
+        for q in (0.0, 0.5, 1.0):
+            assert_close(sketch.quantile(q), exact_quantile(live, q), 0.01)